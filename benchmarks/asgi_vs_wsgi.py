@@ -0,0 +1,152 @@
+"""Сравнение пути чтения под ASGI и WSGI при одинаковом числе воркеров.
+
+WSGI: `--workers` потоков, каждый выполняет запросы по очереди (как
+gunicorn с gthread). ASGI: один цикл событий, столько же одновременных
+запросов и асинхронные представления лент и постов с пулом из
+`--workers` потоков (ASYNC_DB_THREADS). Запросы идут через тестовые
+клиенты Django (`Client` и `AsyncClient`), то есть через полный стек
+middleware, но без сети. Запросы от залогиненного пользователя, чтобы
+не мерить кеш страниц анонимов.
+
+    python benchmarks/asgi_vs_wsgi.py --workers 8 --requests 2000
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlite_concurrency import prepare, setup_django
+
+MODES = ('wsgi', 'asgi')
+
+
+def get_urls():
+    from blog.models import Post
+
+    post_id = Post.objects.values_list('pk', flat=True).first()
+    return ['/', '/?page=2', f'/posts/{post_id}/', '/category/bench/',
+            '/profile/bench/']
+
+
+def configure(mode, db_name, workers):
+    if mode == 'asgi':
+        os.environ['BLOGICUM_SERVER'] = 'asgi'
+    setup_django('development', db_name)
+    from django.conf import settings
+
+    from blog import settings as blog_settings
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS.append('testserver')
+    blog_settings.ASYNC_DB_THREADS = workers
+
+
+def run_wsgi(urls, workers, requests):
+    from django.test import Client
+
+    from blog.models import User
+
+    user = User.objects.get(username='bench')
+    latencies = []
+    lock = threading.Lock()
+
+    def work(count):
+        client = Client()
+        client.force_login(user)
+        for number in range(count):
+            started = time.perf_counter()
+            client.get(urls[number % len(urls)])
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=work, args=(requests // workers,))
+               for _ in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+
+def run_asgi(urls, workers, requests):
+    import asyncio
+
+    from django.test import AsyncClient, Client
+
+    from blog.models import User
+
+    user = User.objects.get(username='bench')
+    session_client = Client()
+    session_client.force_login(user)
+    cookies = session_client.cookies
+    latencies = []
+
+    async def work(count):
+        client = AsyncClient()
+        client.cookies = cookies
+        for number in range(count):
+            started = time.perf_counter()
+            await client.get(urls[number % len(urls)])
+            latencies.append(time.perf_counter() - started)
+
+    async def main():
+        await asyncio.gather(*(work(requests // workers)
+                               for _ in range(workers)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return latencies, time.perf_counter() - started
+
+
+def run_mode(mode, db_name, workers, requests, results):
+    configure(mode, db_name, workers)
+    urls = get_urls()
+    runner = run_asgi if mode == 'asgi' else run_wsgi
+    # Прогрев: шаблоны, соединения, кеш карточек постов.
+    runner(urls, workers, workers * len(urls))
+    results.put((mode, *runner(urls, workers, requests)))
+
+
+def percentile(values, share):
+    return statistics.quantiles(values, n=100)[share - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--posts', type=int, default=500)
+    options = parser.parse_args()
+    context = multiprocessing.get_context('spawn')
+    print(f'{"сервер":<6} {"запросов/с":>11} {"p50, мс":>8}'
+          f' {"p95, мс":>8} {"p99, мс":>8}')
+    with tempfile.TemporaryDirectory() as directory:
+        db_name = str(Path(directory) / 'bench.sqlite3')
+        preparation = context.Process(
+            target=prepare, args=('development', db_name, options.posts)
+        )
+        preparation.start()
+        preparation.join()
+        for mode in MODES:
+            results = context.Queue()
+            process = context.Process(
+                target=run_mode,
+                args=(mode, db_name, options.workers, options.requests,
+                      results),
+            )
+            process.start()
+            mode, latencies, elapsed = results.get()
+            process.join()
+            print(f'{mode:<6} {len(latencies) / elapsed:>11.0f}'
+                  f' {percentile(latencies, 50) * 1000:>8.1f}'
+                  f' {percentile(latencies, 95) * 1000:>8.1f}'
+                  f' {percentile(latencies, 99) * 1000:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
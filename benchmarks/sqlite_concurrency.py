@@ -0,0 +1,189 @@
+"""Нагрузочный тест SQLite: чтение лент и запись комментариев параллельно.
+
+Запускает несколько процессов-читателей (первая страница ленты) и
+процессов-писателей (новый комментарий) на временной копии базы и
+сравнивает пропускную способность профилей `development` и `production`
+(см. `DB_PROFILE` в blogicum/settings.py). Как и в gunicorn, каждая
+операция — отдельный «запрос»: в конце вызывается
+`close_old_connections()`, поэтому без `CONN_MAX_AGE` соединение
+открывается заново. Кеш в обоих профилях одинаковый (`LocMemCache`),
+чтобы сравнивались только настройки базы.
+
+Результаты зависят от машины, диска и нагрузки на неё: каждый профиль
+прогоняется `--repeat` раз, печатаются медиана и разброс, а перед
+таблицей — версии Python и SQLite, число ядер и параметры запуска.
+Из корня репозитория:
+
+    python benchmarks/sqlite_concurrency.py --readers 4 --writers 2 \
+        --seconds 5 --repeat 3
+"""
+import argparse
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'blogicum'
+PROFILES = ('development', 'production')
+
+
+def setup_django(profile, db_name):
+    """Настраивает Django в текущем процессе на временную базу."""
+    os.environ['BLOGICUM_DB_PROFILE'] = profile
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+    sys.path.insert(0, str(PROJECT_DIR))
+    import django
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_name
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+    django.setup()
+
+
+def prepare(profile, db_name, posts):
+    """Создаёт схему и наполняет базу опубликованными постами."""
+    setup_django(profile, db_name)
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from blog.models import Category, Post, User
+
+    call_command('migrate', verbosity=0)
+    author = User.objects.create_user('bench', password='bench')
+    category = Category.objects.create(
+        title='Бенчмарк', slug='bench', is_published=True
+    )
+    Post.objects.bulk_create(
+        Post(
+            title=f'Пост {number}',
+            text='Текст',
+            author=author,
+            category=category,
+            pub_date=timezone.now(),
+            is_published=True,
+            is_visible=True,
+        ) for number in range(posts)
+    )
+
+
+def read_feed():
+    from blog.services.post_utils import (filter_published_posts,
+                                          select_post_related)
+
+    list(select_post_related(filter_published_posts())[:10])
+
+
+def write_comment(post_ids, author_id):
+    from blog.models import Comment
+
+    Comment.objects.create(
+        post_id=random.choice(post_ids), author_id=author_id,
+        text='Комментарий',
+    )
+
+
+def worker(profile, db_name, role, deadline, results):
+    setup_django(profile, db_name)
+    from django.db import OperationalError, close_old_connections
+
+    from blog.models import Post, User
+
+    if role == 'read':
+        operation = read_feed
+    else:
+        # Посты и автора читаем один раз: в замер идёт только запись.
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        author_id = User.objects.get(username='bench').pk
+        close_old_connections()
+
+        def operation():
+            write_comment(post_ids, author_id)
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            operation()
+            done += 1
+        except OperationalError:
+            errors += 1
+        finally:
+            close_old_connections()
+    results.put((role, done, errors))
+
+
+def run_profile(profile, options):
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        db_name = str(Path(directory) / 'bench.sqlite3')
+        preparation = context.Process(
+            target=prepare, args=(profile, db_name, options.posts)
+        )
+        preparation.start()
+        preparation.join()
+        results = context.Queue()
+        # Запас на запуск процессов, чтобы все начали одновременно.
+        deadline = time.monotonic() + 2 + options.seconds
+        roles = ['read'] * options.readers + ['write'] * options.writers
+        processes = [
+            context.Process(
+                target=worker,
+                args=(profile, db_name, role, deadline, results),
+            ) for role in roles
+        ]
+        for process in processes:
+            process.start()
+        totals = {'read': [0, 0], 'write': [0, 0]}
+        for _ in processes:
+            role, done, errors = results.get()
+            totals[role][0] += done
+            totals[role][1] += errors
+        for process in processes:
+            process.join()
+    return totals
+
+
+def describe(values):
+    """«медиана (минимум–максимум)» для операций в секунду."""
+    if len(values) == 1:
+        return f'{values[0]:.0f}'
+    return (f'{statistics.median(values):.0f}'
+            f' ({min(values):.0f}–{max(values):.0f})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--posts', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args()
+    print(f'Python {platform.python_version()},'
+          f' SQLite {sqlite3.sqlite_version}, ядер: {os.cpu_count()},'
+          f' {platform.system()} {platform.release()}')
+    print(f'читателей: {options.readers}, писателей: {options.writers},'
+          f' {options.seconds:g} с x {options.repeat},'
+          f' постов: {options.posts}')
+    print(f'{"профиль":<12} {"чтений/с":>16} {"записей/с":>16}'
+          f' {"ошибок":>8}')
+    for profile in PROFILES:
+        reads, writes, errors = [], [], 0
+        for _ in range(options.repeat):
+            totals = run_profile(profile, options)
+            reads.append(totals['read'][0] / options.seconds)
+            writes.append(totals['write'][0] / options.seconds)
+            errors += totals['read'][1] + totals['write'][1]
+        print(f'{profile:<12} {describe(reads):>16}'
+              f' {describe(writes):>16} {errors:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,30 +1,103 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group
+from django.db import models
 from django.utils.safestring import mark_safe
 
 from . import settings
+from .forms import BoundedImageField
 from .models import Category, Comment, Location, Post
+from .services.search import match_posts
+from .services.writer import store_files, submit_write
 
 admin.site.empty_value_display = 'Не задано'
 
 admin.site.unregister(Group)
 
 
+class WriteCoordinatorAdmin(admin.ModelAdmin):
+    """Админка, которая пишет в базу через координатор записи.
+
+    Сохранение объекта, его связей и запись журнала админки передаются
+    координатору одной операцией (`save_and_log`), удаление и записи
+    о нём — другой (`delete_and_log`): ошибка любой части отменяет всю
+    операцию, как в транзакции обычной админки. Разбор формы, сохранение
+    файлов и ответ остаются в потоке запроса. Транзакция представления
+    админки к этому моменту только читала, поэтому операции передаются
+    через `submit_write()`.
+    """
+
+    def save_model(self, request, obj, form, change):
+        # Объект сохраняется вместе со связями и записью журнала
+        # в log_addition() и log_change(), которые вызываются следом.
+        store_files(obj)
+
+    def save_related(self, request, form, formsets, change):
+        request._admin_save = (form, formsets, change)
+
+    def log_addition(self, request, object, message):
+        return submit_write(self.save_and_log, request, object,
+                            super().log_addition, message)
+
+    def log_change(self, request, object, message):
+        return submit_write(self.save_and_log, request, object,
+                            super().log_change, message)
+
+    def save_and_log(self, request, obj, log, message):
+        pending = request.__dict__.pop('_admin_save', None)
+        if pending is not None:
+            form, formsets, change = pending
+            super().save_model(request, obj, form, change)
+            super().save_related(request, form, formsets, change)
+        return log(request, obj, message)
+
+    def log_deletion(self, request, object, object_repr):
+        # Запись журнала делается вместе с удалением, которое следует
+        # за ней: в delete_model() или delete_queryset().
+        request.__dict__.setdefault('_admin_deletions', []).append(
+            (object, object_repr)
+        )
+
+    def delete_model(self, request, obj):
+        submit_write(self.delete_and_log, request, super().delete_model,
+                     obj)
+
+    def delete_queryset(self, request, queryset):
+        submit_write(self.delete_and_log, request, super().delete_queryset,
+                     queryset)
+
+    def delete_and_log(self, request, delete, target):
+        for obj, object_repr in request.__dict__.pop('_admin_deletions', []):
+            super().log_deletion(request, obj, object_repr)
+        delete(request, target)
+
+
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(WriteCoordinatorAdmin):
     list_display = ('title', 'trim_text', 'created_at', 'pub_date',
                     'is_published', 'category', 'location', 'image_tag',)
     list_editable = ('is_published', 'pub_date', 'category', 'location',)
     list_display_links = ('title', 'image_tag',)
     readonly_fields = ('image_tag',)
+    # Поиск идёт по полнотекстовому индексу, см. get_search_results().
+    search_fields = ('title', 'text')
+    formfield_overrides = {
+        models.ImageField: {'form_class': BoundedImageField},
+    }
 
     @admin.display(description='Превью изображения')
     @mark_safe
     def image_tag(self, post):
         if post.image:
-            return (f'<img src={post.image.url} '
+            return (f'<img src={post.get_image_url("admin")} '
                     f'{settings.ADMIN_IMAGE_PREVIEW_SIZE}>')
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            pk__in=match_posts(search_term).values('post')
+        ), False
+
     @admin.display(description='Текст')
     # Для поля 'text' создаём превью заданной длины:
     def trim_text(self, post):
@@ -32,7 +105,7 @@ class PostAdmin(admin.ModelAdmin):
 
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(WriteCoordinatorAdmin):
     list_display = ('title', 'is_published', 'posts_count',)
     list_editable = ('is_published', 'title', )
     list_display_links = ('posts_count',)
@@ -43,7 +116,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Location)
-class LocationAdmin(admin.ModelAdmin):
+class LocationAdmin(WriteCoordinatorAdmin):
     list_display = ('name', 'is_published', 'posts_count',)
     list_editable = ('is_published', 'name',)
     list_display_links = ('posts_count', )
@@ -54,9 +127,16 @@ class LocationAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(WriteCoordinatorAdmin):
     list_display = ('trim_text', 'author', 'created_at', 'post',)
     list_display_links = ('trim_text', 'author', 'post')
+    # Комментарии могут быть в другой базе: вместо JOIN — отдельные запросы.
+    list_select_related = ()
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            'author', 'post'
+        )
 
     @admin.display(description='Комментарий')
     # Для поля 'text' создаём превью заданной длины:
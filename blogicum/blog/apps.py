@@ -5,3 +5,20 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+        from PIL import Image
+
+        from . import signals  # noqa: F401
+        from .sqlite import apply_sqlite_pragmas
+
+        connection_created.connect(
+            apply_sqlite_pragmas, dispatch_uid='blog.sqlite_pragmas'
+        )
+        # Защита от «бомб» и при уменьшении изображений: Pillow не станет
+        # декодировать изображение вдвое больше лимита.
+        max_pixels = getattr(settings, 'IMAGE_MAX_PIXELS', None)
+        if max_pixels:
+            Image.MAX_IMAGE_PIXELS = max_pixels
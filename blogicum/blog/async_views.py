@@ -0,0 +1,68 @@
+"""Асинхронные версии представлений только для чтения для ASGI.
+
+Под ASGI Django 3.2 выполняет каждое синхронное представление и каждое
+синхронное middleware через `sync_to_async` — отдельным потоком на
+запрос, без ограничения их числа. Здесь представление целиком (выборки,
+кеш, отрисовка шаблона) выполняется одним переходом в общий пул из
+`ASYNC_DB_THREADS` потоков, а цикл событий тем временем обслуживает
+другие запросы. Пул ограничивает и число одновременных соединений
+с базой — у SQLite писатель всё равно один.
+
+ORM и кеш в Django 3.2 синхронные, поэтому «ожидание» базы и кеша —
+это ожидание задачи пула; логика представлений при этом общая
+с синхронными версиями.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+from . import settings
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_DB_THREADS, thread_name_prefix='blog-db'
+)
+
+
+def _run_and_release(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Запрос для потока пула окончен: закрываем соединение, если
+        # истёк CONN_MAX_AGE, как это делает request_finished.
+        close_old_connections()
+
+
+async def run_in_pool(func, *args, **kwargs):
+    """Выполняет синхронную функцию в пуле и ждёт результата.
+
+    Контекстные переменные (например, разрешение читать из реплик)
+    передаются в поток пула.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor,
+        functools.partial(
+            context.run, _run_and_release, func, *args, **kwargs
+        ),
+    )
+
+
+def _render(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+def as_async_view(view_class, **initkwargs):
+    """Асинхронное представление из синхронного класса представления."""
+    view = view_class.as_view(**initkwargs)
+
+    async def async_view(request, *args, **kwargs):
+        return await run_in_pool(_render, view, request, *args, **kwargs)
+
+    functools.update_wrapper(async_view, view)
+    return async_view
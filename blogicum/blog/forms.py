@@ -1,13 +1,100 @@
 from django import forms
+from django.conf import settings as django_settings
+from django.core.exceptions import ValidationError
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
 
 from .models import Comment, Post
+from .services.resumable import get_upload
+from .uploads import RejectedUpload
+
+
+class BoundedImageField(forms.ImageField):
+    """Изображение с ограничением размера файла и числа пикселей.
+
+    Размер проверяет ещё обработчик загрузки (blog/uploads.py), а размеры
+    изображения читаются из заголовка файла — до того, как Pillow начнёт
+    его разбирать.
+    """
+
+    default_error_messages = {
+        'too_large': 'Файл слишком большой: допускается не больше %(limit)s.',
+        'too_many_pixels': (
+            'Изображение слишком большое: допускается не больше '
+            '%(limit)s мегапикселей.'
+        ),
+    }
+
+    def to_python(self, data):
+        if isinstance(data, RejectedUpload):
+            raise ValidationError(
+                self.error_messages['too_large'], code='too_large',
+                params={'limit': filesizeformat(data.limit)},
+            )
+        max_pixels = getattr(django_settings, 'IMAGE_MAX_PIXELS', None)
+        if data and max_pixels and self.count_pixels(data) > max_pixels:
+            raise ValidationError(
+                self.error_messages['too_many_pixels'],
+                code='too_many_pixels',
+                params={'limit': f'{max_pixels / 10 ** 6:g}'},
+            )
+        return super().to_python(data)
+
+    @staticmethod
+    def count_pixels(data):
+        # Image.open() читает только заголовок, данные не декодируются.
+        try:
+            with Image.open(data) as image:
+                return image.width * image.height
+        except Image.DecompressionBombError:
+            return float('inf')
+        except Exception:
+            # Не изображение: об этом сообщит проверка ImageField.
+            return 0
+        finally:
+            data.seek(0)
 
 
 class PostForm(forms.ModelForm):
+    # Токен докачанной загрузки (blog/services/resumable.py) — изображение,
+    # загруженное заранее по частям, вместо файла в самой форме.
+    upload_token = forms.CharField(required=False, widget=forms.HiddenInput)
+    upload = None
+
+    def clean(self):
+        cleaned_data = super().clean()
+        token = cleaned_data.get('upload_token')
+        if not token or self.files.get(self.add_prefix('image')):
+            return cleaned_data
+        upload = get_upload(token, self.instance.author_id)
+        if upload is None or not upload.finished:
+            self.add_error('upload_token', 'Загрузка не найдена или не '
+                                           'завершена.')
+            return cleaned_data
+        # Файл открыт только на время проверки: хранилище перемещает его
+        # по пути (`temporary_file_path`), а форма может и не сохраниться.
+        with upload.open() as image:
+            try:
+                cleaned_data['image'] = self.fields['image'].clean(
+                    image, self.instance.image
+                )
+            except ValidationError as error:
+                self.add_error('image', error)
+            else:
+                self.upload = upload
+        return cleaned_data
+
+    def save(self, commit=True):
+        post = super().save(commit)
+        if commit and self.upload is not None:
+            # Файл уже перемещён в хранилище, остались метаданные.
+            self.upload.delete()
+        return post
 
     class Meta:
         model = Post
         exclude = ('author',)
+        field_classes = {'image': BoundedImageField}
         widgets = {
             'pub_date': forms.DateTimeInput(attrs={
                 'type': 'date',
@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.services.imaging import mp_context, render_thumbnails
+from blog.services.thumbnails import (get_rendered_variants,
+                                      plan_thumbnails, save_variants)
+
+
+class Command(BaseCommand):
+    help = ('Создаёт уменьшенные копии изображений постов, у которых их '
+            'ещё нет, на всех ядрах процессора.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии и для постов, у которых они уже есть.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Количество процессов.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only('pk', 'image',
+                                                    'image_variants')
+        if not options['all']:
+            posts = posts.filter(image_variants={})
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'],
+                                 mp_context=mp_context) as pool:
+            jobs = {}
+            for post in posts.iterator():
+                arguments, names = plan_thumbnails(post)
+                future = pool.submit(render_thumbnails, *arguments)
+                jobs[future] = (post, names)
+            for future in as_completed(jobs):
+                if future.exception() is not None:
+                    failed += 1
+                    self.stderr.write(
+                        f'Пост {jobs[future][0].pk}: {future.exception()}'
+                    )
+                    continue
+                post, names = jobs[future]
+                # Копии, которых в новом наборе нет (например, после
+                # изменения IMAGE_WIDTHS), удалит команда purge_media:
+                # они могут быть и у других постов с тем же изображением.
+                variants = get_rendered_variants(names, future.result())
+                done += save_variants(post.pk, post.image.name, variants)
+        self.stdout.write(f'Созданы копии для постов: {done}, '
+                          f'ошибок: {failed}.')
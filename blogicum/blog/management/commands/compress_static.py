@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.staticfiles import compress_directory
+
+
+class Command(BaseCommand):
+    help = ('Кладёт рядом с собранной статикой (STATIC_ROOT) её сжатые '
+            'копии .gz и .br. В профиле production это делает сам '
+            'collectstatic.')
+
+    def handle(self, *args, **options):
+        written = compress_directory(settings.STATIC_ROOT)
+        self.stdout.write(f'Создано сжатых копий: {written}.')
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from blog.services.post_utils import get_next_publication, publish_due_posts
+
+
+class Command(BaseCommand):
+    help = ('Публикует отложенные посты, дата публикации которых наступила. '
+            'С ключом --watch работает постоянно и просыпается к дате '
+            'ближайшей публикации.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Не завершаться, а ждать следующих публикаций.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help='Наибольшая пауза между проверками в режиме --watch, сек. '
+                 'Нужна, чтобы заметить посты, отложенные другими процессами.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            published = publish_due_posts()
+            if published:
+                self.stdout.write(f'Опубликовано постов: {published}.')
+            if not options['watch']:
+                return
+            time.sleep(self.get_delay(options['interval']))
+
+    def get_delay(self, interval):
+        next_pub_date = get_next_publication(use_cache=False)
+        if next_pub_date is None:
+            return interval
+        return min(interval, max(0, (next_pub_date - now()).total_seconds()))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from blog import settings
+from blog.services.thumbnails import purge_media
+
+
+class Command(BaseCommand):
+    help = ('Удаляет изображения постов и их копии, на которые не ссылается '
+            'ни один пост.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace',
+            type=float,
+            default=settings.MEDIA_PURGE_GRACE,
+            help='Сколько секунд не удалять файл после его сохранения.',
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_media(options['grace'])
+        self.stdout.write(f'Удалено файлов: {purged}.')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from blog import settings
+from blog.services.resumable import purge_uploads
+
+
+class Command(BaseCommand):
+    help = ('Удаляет докачиваемые загрузки изображений, которые так и не '
+            'стали постами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age',
+            type=float,
+            default=settings.RESUMABLE_UPLOAD_TTL,
+            help='Возраст загрузки, после которого она удаляется, сек.',
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_uploads(options['max_age'])
+        self.stdout.write(f'Удалено загрузок: {purged}.')
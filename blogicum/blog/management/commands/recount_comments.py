@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog.services.post_utils import recount_comments
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики комментариев постов '
+            'и исправляет расхождения.')
+
+    def handle(self, *args, **options):
+        fixed = recount_comments()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков комментариев: {fixed}.'
+        ))
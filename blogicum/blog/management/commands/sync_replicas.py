@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from blog.sqlite import copy_database
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики из настройки '
+            'DATABASE_REPLICAS — замена репликации для локальной проверки. '
+            'С ключом --watch повторяет копирование с заданным интервалом.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Не завершаться, а обновлять реплики постоянно.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза между копированиями в режиме --watch, сек. '
+                 'Должна быть меньше REPLICA_PIN_SECONDS.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                copy_database(connections[DEFAULT_DB_ALIAS],
+                              settings.DATABASES[alias]['NAME'])
+                self.stdout.write(f'Реплика {alias} обновлена.')
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,203 @@
+"""Раздача загруженных файлов (MEDIA_ROOT).
+
+Способ раздачи задаёт `MEDIA_SERVING` (blogicum/settings.py):
+- 'x-accel-redirect' (nginx) и 'x-sendfile' (Apache, lighttpd): Django
+  только проверяет доступ и отвечает заголовком, а файл передаёт
+  фронт-сервер, не занимая воркер. Для nginx нужен internal-location
+  `MEDIA_ACCEL_PREFIX`, который смотрит в MEDIA_ROOT:
+      location /protected-media/ { internal; alias /srv/blogicum/media/; }
+- 'python': файл отдаёт Django — с поддержкой Range и условных запросов;
+  под gunicorn тело уходит через sendfile (wsgi.file_wrapper), минуя
+  Python;
+- пустая строка: медиа раздаёт фронт-сервер сам, без проверок доступа.
+
+Изображения постов, которые не видны в лентах (не опубликованы, отложены,
+в снятой категории), доступны только автору и персоналу. Файлы с именами
+по содержимому (blog/storage.py) не меняются, поэтому общедоступные
+из них отдаются с `Cache-Control: immutable`, но только на
+`MEDIA_MAX_AGE`: после снятия поста с публикации браузеры и прокси
+отдают закешированный файл ещё не дольше этого срока.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings as django_settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import re_path
+from django.utils._os import safe_join
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                quote_etag)
+from django.utils.http import http_date
+
+from . import settings
+from .models import Post
+from .services.thumbnails import THUMBNAILS_DIR
+from .storage import is_content_addressed
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Часть файла длиной `length` байт с позиции `start`.
+
+    Файловый дескриптор остаётся доступен (`fileno`): wsgi.file_wrapper
+    отправит часть через sendfile с текущей позиции, ограничившись
+    Content-Length ответа.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def get_image_posts(name):
+    """Посты, которым принадлежит изображение или его копия.
+
+    Условие `image != ''` повторяет условие частичного индекса
+    по изображению — без него SQLite индекс не выберет.
+    """
+    posts = Post.objects.exclude(image='').order_by()
+    directory, filename = posixpath.split(name)
+    parent, folder = posixpath.split(directory)
+    if posixpath.basename(parent) == THUMBNAILS_DIR and folder:
+        original = posixpath.join(posixpath.dirname(parent),
+                                  posixpath.splitext(filename)[0])
+        # Диапазон, а не startswith: LIKE в SQLite не использует индекс.
+        # Имена оригинала — «<original>.<расширение>», а «/» следует
+        # в ASCII сразу за «.».
+        return posts.filter(image__gte=f'{original}.',
+                            image__lt=f'{original}/')
+    return posts.filter(image=name)
+
+
+def get_access(request, name):
+    """'public', 'private' (только автору и персоналу) или None."""
+    posts = list(get_image_posts(name).values_list('is_visible',
+                                                   'author_id'))
+    if any(is_visible for is_visible, _ in posts):
+        return 'public'
+    user = getattr(request, 'user', None)
+    if posts and user is not None and user.is_authenticated and (
+            user.is_staff
+            or user.pk in {author_id for _, author_id in posts}):
+        return 'private'
+    return None
+
+
+def parse_range(request, size, etag, last_modified):
+    """(начало, конец) из заголовка Range; None — отдать файл целиком.
+
+    Поддерживается один диапазон; несколько, как и неразборчивый
+    заголовок, RFC 7233 разрешает игнорировать. `ValueError` —
+    диапазон за пределами файла.
+    """
+    match = RANGE.match(request.headers.get('Range', '').replace(' ', ''))
+    if match is None or not any(match.groups()):
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range not in (etag, http_date(last_modified)):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Диапазон за пределами файла.')
+    return start, end
+
+
+def file_response(request, path, content_type=None):
+    """Ответ с файлом: условные запросы, Range и sendfile."""
+    stat = os.stat(path)
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag,
+                                        last_modified=last_modified)
+    if response is None:
+        content_type = (content_type or mimetypes.guess_type(path)[0]
+                        or 'application/octet-stream')
+        try:
+            byte_range = parse_range(request, stat.st_size, etag,
+                                     last_modified)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        file = open(path, 'rb')
+        if byte_range is None:
+            response = FileResponse(file, content_type=content_type)
+        else:
+            start, end = byte_range
+            response = FileResponse(
+                FileRange(file, start, end - start + 1), status=206,
+                content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = end - start + 1
+        response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def serve(request, path):
+    try:
+        full_path = safe_join(django_settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Файл не найден.')
+    if not os.path.isfile(full_path):
+        raise Http404('Файл не найден.')
+    name = posixpath.normpath(path).lstrip('/')
+    access = get_access(request, name)
+    if access is None:
+        raise Http404('Файл не найден.')
+
+    serving = django_settings.MEDIA_SERVING
+    if serving in ('x-accel-redirect', 'x-sendfile'):
+        response = HttpResponse(content_type=(
+            mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        ))
+        if serving == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = (
+                django_settings.MEDIA_ACCEL_PREFIX + quote(name)
+            )
+        else:
+            response['X-Sendfile'] = full_path
+    else:
+        response = file_response(request, full_path)
+
+    if access == 'private':
+        patch_cache_control(response, private=True, no_cache=True)
+    elif is_content_addressed(name):
+        patch_cache_control(response, public=True,
+                            max_age=settings.MEDIA_MAX_AGE,
+                            immutable=True)
+    return response
+
+
+def media_urlpatterns():
+    """Маршрут раздачи MEDIA_URL, если файлы раздаёт не фронт-сервер."""
+    if not django_settings.MEDIA_SERVING:
+        return []
+    prefix = re.escape(django_settings.MEDIA_URL.lstrip('/'))
+    return [re_path(rf'^{prefix}(?P<path>.+)$', serve, name='media')]
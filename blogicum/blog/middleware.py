@@ -0,0 +1,30 @@
+from django.conf import settings as django_settings
+from django.utils.deprecation import MiddlewareMixin
+
+from . import settings
+
+
+class PrimaryPinMiddleware(MiddlewareMixin):
+    """Закрепляет пользователя за основной базой после записи.
+
+    Любой небезопасный запрос (POST и т. п.) ставит cookie на
+    `REPLICA_PIN_SECONDS` секунд; пока она есть, `ReplicaReadMixin`
+    не пускает запросы пользователя в реплики, и он видит свои новые
+    посты и комментарии, даже если реплики ещё не догнали основную базу.
+    `MiddlewareMixin` делает его пригодным и для ASGI.
+    """
+
+    def process_request(self, request):
+        request.pinned_to_primary = (
+            settings.REPLICA_PIN_COOKIE in request.COOKIES
+        )
+
+    def process_response(self, request, response):
+        if (request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+                and getattr(django_settings, 'DATABASE_REPLICAS', [])):
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
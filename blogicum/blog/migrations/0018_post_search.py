@@ -0,0 +1,63 @@
+# Generated by Django 3.2.16 on 2026-10-17 07:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Вес заголовка и текста в ранжировании BM25.
+RANK = 'bm25(10.0, 1.0)'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Post = apps.get_model('blog', 'Post')
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE blog_post_search USING fts5('
+        "title, text, tokenize='unicode61 remove_diacritics 2', "
+        "prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO blog_post_search (blog_post_search, rank) "
+        "VALUES ('rank', %s)", (RANK,)
+    )
+    for pk, title, text in Post.objects.using(
+            schema_editor.connection.alias
+    ).values_list('pk', 'title', 'text').iterator():
+        schema_editor.execute(
+            'INSERT INTO blog_post_search (rowid, title, text) '
+            'VALUES (%s, %s, %s)',
+            (pk, *(value.replace('ё', 'е').replace('Ё', 'Е')
+                   for value in (title, text))),
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS blog_post_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_comment_cross_database'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearch',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to='blog.post')),
+                ('title', models.TextField()),
+                ('text', models.TextField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'blog_post_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(
+            create_search_index, drop_search_index,
+            hints={'model_name': 'post'},
+        ),
+    ]
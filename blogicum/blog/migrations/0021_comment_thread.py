@@ -0,0 +1,51 @@
+# Generated by Django 3.2.16 on 2026-10-17 10:12
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_comment_threads(apps, schema_editor):
+    # Ветки создаются в той же базе, где лежат комментарии.
+    db_alias = schema_editor.connection.alias
+    Comment = apps.get_model('blog', 'Comment')
+    CommentThread = apps.get_model('blog', 'CommentThread')
+    counts = (
+        Comment.objects.using(db_alias).order_by().values_list('post_id')
+        .annotate(count=Count('pk'))
+    )
+    CommentThread.objects.using(db_alias).bulk_create(
+        [CommentThread(post_id=post_id, count=count)
+         for post_id, count in counts],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0020_post_image_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentThread',
+            fields=[
+                ('post', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='comment_thread', serialize=False, to='blog.post', verbose_name='публикация')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество комментариев')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Изменено')),
+            ],
+            options={
+                'verbose_name': 'ветка комментариев',
+                'verbose_name_plural': 'Ветки комментариев',
+            },
+        ),
+        migrations.RunPython(
+            fill_comment_threads, migrations.RunPython.noop,
+            hints={'model_name': 'commentthread'},
+        ),
+        migrations.RemoveField(
+            model_name='post',
+            name='comment_count',
+        ),
+    ]
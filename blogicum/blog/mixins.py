@@ -1,19 +1,76 @@
+import datetime
+import hashlib
+
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                quote_etag)
+from django.utils.http import http_date
 
+from . import settings
 from .forms import CommentForm, PostForm
 from .models import Comment, Post
+from .routers import get_replicas, read_from_replicas
+from .services.page_cache import get_cached_page, get_feed_version
+from .services.pagination import CursorPaginator, HydratingPaginator
+from .services.post_utils import (FEED_ORDERING, activate_scheduled_posts,
+                                  hydrate_posts)
+from .services.resumable import TUS_EXTENSIONS, TUS_VERSION, UploadError
+from .services.writer import run_write, store_files
+from .uploads import get_upload_max_bytes
+
+
+class IdentityMapMixin:
+    """Карта объектов запроса: каждая строка загружается не больше раза.
+
+    Экземпляр представления создаётся на каждый запрос, поэтому карта
+    живёт на нём и не переживает запрос. `get_object()` без аргументов
+    запоминается автоматически, остальные выборки — через `remember()`.
+    """
+
+    def remember(self, key, load):
+        """Возвращает объект по ключу, загружая его `load()` один раз."""
+        identity_map = self.__dict__.setdefault('_identity_map', {})
+        if key not in identity_map:
+            identity_map[key] = load()
+        return identity_map[key]
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        return self.remember('object', super().get_object)
+
+
+class WriteCoordinatorMixin:
+    """Сохранение формы и удаление объекта через координатор записи.
+
+    Файлы формы сохраняются в потоке запроса, писателю остаётся запись
+    в базу.
+    """
+
+    def form_valid(self, form):
+        store_files(form.instance)
+        self.object = run_write(form.save)
+        return HttpResponseRedirect(self.get_success_url())
+
+    def delete(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        run_write(self.object.delete)
+        return HttpResponseRedirect(success_url)
 
 
-class OnlyAuthorMixin(UserPassesTestMixin):
+class OnlyAuthorMixin(IdentityMapMixin, UserPassesTestMixin):
     """Даёт доступ к контенту только его автору."""
 
     def test_func(self):
-        return self.get_object().author == self.request.user
+        return self.get_object().author_id == self.request.user.pk
 
 
-class PostMixin(OnlyAuthorMixin, LoginRequiredMixin):
+class PostMixin(OnlyAuthorMixin, LoginRequiredMixin, WriteCoordinatorMixin):
     model = Post
     template_name = 'blog/create.html'
     pk_url_kwarg = 'post_id'
@@ -25,14 +82,15 @@ class PostMixin(OnlyAuthorMixin, LoginRequiredMixin):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['form'] = PostForm(instance=self.get_object())
+        # У DeleteView своей формы нет, а шаблон выводит пост через неё.
+        context.setdefault('form', PostForm(instance=self.object))
         return context
 
     def get_success_url(self):
         return reverse('blog:profile', args=(self.request.user.username,))
 
 
-class CommentMixin(LoginRequiredMixin):
+class CommentMixin(LoginRequiredMixin, WriteCoordinatorMixin):
     model = Comment
     template_name = 'blog/comment.html'
     pk_url_kwarg = 'comment_id'
@@ -41,3 +99,197 @@ class CommentMixin(LoginRequiredMixin):
     def get_success_url(self):
         return reverse('blog:post_detail',
                        args=(self.kwargs['post_id'],))
+
+
+class PostFeedMixin:
+    """Пагинация ленты постов согласно настройке `POSTS_PAGINATION`.
+
+    `get_queryset()` должен возвращать только отфильтрованные посты: страница
+    выбирается узким запросом по индексу, а связанные объекты загружаются
+    уже для постов одной страницы (`hydrate_posts`).
+    """
+
+    paginate_by = settings.POSTS_PER_PAGE
+    cursor_kwarg = 'cursor'
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        if settings.POSTS_PAGINATION == 'cursor':
+            return CursorPaginator(queryset, per_page, FEED_ORDERING,
+                                   hydrate=hydrate_posts)
+        return HydratingPaginator(queryset, per_page, hydrate_posts, **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        queryset = queryset.order_by(*FEED_ORDERING)
+        if settings.POSTS_PAGINATION != 'cursor':
+            return super().paginate_queryset(queryset, page_size)
+        paginator = self.get_paginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidPage as error:
+            raise Http404(f'Неверная страница: {error}')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class ReplicaReadMixin:
+    """Разрешает представлению только для чтения читать из реплик.
+
+    Не действует, пока пользователь закреплён за основной базой после
+    записи (blog/middleware.py), и для страниц, которые кешируются для
+    всех (`read_from_primary`). Ответ отрисовывается здесь же, чтобы
+    ленивые выборки шаблона тоже ушли в реплику; после этого
+    `rendered_from_replica` истинно.
+    """
+
+    read_from_primary = False
+    rendered_from_replica = False
+
+    def dispatch(self, request, *args, **kwargs):
+        if (not get_replicas() or self.read_from_primary
+                or request.method not in ('GET', 'HEAD')
+                or getattr(request, 'pinned_to_primary', False)):
+            return super().dispatch(request, *args, **kwargs)
+        # Пользователь запроса загружается из основной базы: только что
+        # зарегистрированный ещё может отсутствовать в репликах.
+        request.user.is_authenticated
+        self.rendered_from_replica = True
+        with read_from_replicas():
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+
+class AnonymousPageCacheMixin:
+    """Кеширует страницу целиком для анонимных пользователей.
+
+    Кеш сбрасывается сигналами об изменении контента, см.
+    blog/services/page_cache.py. Версия лент отражает основную базу,
+    поэтому и страница строится по ней, а не по отстающей реплике.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+        self.read_from_primary = True
+        # Публикация по расписанию сбрасывает кеш, поэтому проверяется
+        # до обращения к нему.
+        activate_scheduled_posts()
+        return get_cached_page(
+            request, lambda: super(AnonymousPageCacheMixin, self).dispatch(
+                request, *args, **kwargs)
+        )
+
+
+class ConditionalGetMixin:
+    """Условные GET-запросы: ответ 304 Not Modified без построения страницы.
+
+    Валидаторы (ETag и Last-Modified) считаются по времени последнего
+    изменения из `get_last_modified()` — оно должно быть дешёвым и не
+    требовать выборки контента страницы, но проверять доступ к ней.
+    Ответ 304 даётся только по ETag: в нём время с долями секунды, а
+    Last-Modified — с точностью до секунды, и по If-Modified-Since правка
+    в ту же секунду осталась бы незамеченной. Страница зависит и от того, кто
+    её смотрит, поэтому пользователь входит в ETag. Валидаторы считаются
+    по основной базе, поэтому у страницы, построенной по реплике, их нет:
+    иначе клиент получал бы 304 на копию, отставшую от валидатора.
+    """
+
+    def get_last_modified(self):
+        raise NotImplementedError(
+            'Определите get_last_modified() в наследнике ConditionalGetMixin'
+        )
+
+    def get_response_last_modified(self, response, last_modified):
+        """Время изменения, по которому построен `response`.
+
+        Обычно это `last_modified`, но ответ из кеша может быть построен
+        по более ранней версии.
+        """
+        return last_modified
+
+    def get_etag(self, last_modified):
+        user_id = self.request.user.pk or 'anonymous'
+        digest = hashlib.md5(
+            f'{last_modified.isoformat()}:{user_id}'.encode()
+        ).hexdigest()
+        return quote_etag(digest)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        # Публикация по расписанию меняет версии, поэтому до их чтения.
+        activate_scheduled_posts()
+        last_modified = self.get_last_modified()
+        if last_modified is None:
+            return super().dispatch(request, *args, **kwargs)
+        etag = self.get_etag(last_modified)
+        timestamp = int(last_modified.timestamp())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            rendered_at = self.get_response_last_modified(response,
+                                                          last_modified)
+            if rendered_at != last_modified:
+                etag = self.get_etag(rendered_at)
+                timestamp = int(rendered_at.timestamp())
+        if (response.status_code in (200, 304)
+                and not getattr(self, 'rendered_from_replica', False)):
+            response.headers['ETag'] = etag
+            response.headers['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, no_cache=True)
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True)
+        return response
+
+
+class FeedConditionalGetMixin(ConditionalGetMixin):
+    """Валидаторы лент по версии, которая меняется при изменении контента."""
+
+    def get_last_modified(self):
+        return self.get_version_time(get_feed_version())
+
+    def get_response_last_modified(self, response, last_modified):
+        # Пока страницу перестраивает другой процесс, из кеша отдаётся
+        # прежняя копия (blog/services/page_cache.py): с валидаторами
+        # текущей версии клиент получал бы на неё 304 и после перестройки.
+        version = getattr(response, 'feed_version', None)
+        if version is None:
+            return last_modified
+        return self.get_version_time(version)
+
+    @staticmethod
+    def get_version_time(version):
+        return datetime.datetime.fromtimestamp(
+            version / 10 ** 9, datetime.timezone.utc
+        )
+
+
+class ResumableUploadMixin(LoginRequiredMixin):
+    """Общее для точек протокола tus (blog/services/resumable.py).
+
+    Запросы без заголовка Tus-Resumable отклоняются, `UploadError`
+    превращается в ответ с его кодом. CSRF-токен клиент передаёт
+    в заголовке X-CSRFToken.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if (request.method != 'OPTIONS'
+                and request.headers.get('Tus-Resumable') != TUS_VERSION):
+            response = HttpResponse(status=412)
+            response['Tus-Version'] = TUS_VERSION
+            return response
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except UploadError as error:
+            response = HttpResponse(str(error), status=error.status)
+        response['Tus-Resumable'] = TUS_VERSION
+        return response
+
+    def options(self, request, *args, **kwargs):
+        response = HttpResponse(status=204)
+        response['Tus-Version'] = TUS_VERSION
+        response['Tus-Extension'] = TUS_EXTENSIONS
+        max_bytes = get_upload_max_bytes()
+        if max_bytes is not None:
+            response['Tus-Max-Size'] = max_bytes
+        return response
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.timezone import now
 
 from . import settings
 
@@ -94,24 +95,145 @@ class Post(PublishedCreatedModel):
         upload_to='posts_images',
         blank=True
     )
+    # Уменьшенные копии изображения для лент и админки, например
+    # {'admin': 'posts_images/thumbnails/admin/photo.jpg',
+    #  'webp-640': 'posts_images/thumbnails/640/photo.webp'}. Создаются
+    # в фоне после загрузки изображения (blog/services/thumbnails.py):
+    image_variants = models.JSONField(
+        'Варианты изображения',
+        default=dict,
+        editable=False,
+    )
+    # Виден ли пост в лентах: опубликован, дата публикации наступила
+    # и категория опубликована. Пересчитывается при сохранении поста
+    # и изменении категории (blog/signals.py), а для отложенных постов —
+    # командой `manage.py publish_scheduled` (см. publish_due_posts
+    # в blog/services/post_utils.py):
+    is_visible = models.BooleanField(
+        'Виден в лентах',
+        default=False,
+        editable=False,
+    )
+    # Версия поста для кеша карточек: меняется и при изменении автора,
+    # категории и местоположения (blog/signals.py). Комментарии поста
+    # версионируются отдельно, см. `CommentThread`:
+    updated_at = models.DateTimeField(
+        'Изменено',
+        auto_now=True,
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        # Индексы под выборки лент (см. blog/services/post_utils.py):
+        # общая лента, лента категории и профиль автора.
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_visible=True),
+                name='post_feed_idx',
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                condition=models.Q(is_visible=True),
+                name='post_category_feed_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_feed_idx',
+            ),
+            # Очередь отложенных публикаций:
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_visible=False),
+                name='post_scheduled_idx',
+            ),
+            # Ссылки на общий файл изображения (blog/storage.py):
+            models.Index(
+                fields=('image',),
+                condition=~models.Q(image=''),
+                name='post_image_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title[:settings.TITLE_PREVIEW_LENGTH]
 
+    def get_image_url(self, variant):
+        """URL уменьшенной копии изображения, а пока её нет — оригинала."""
+        name = self.image_variants.get(variant)
+        if name:
+            return self.image.storage.url(name)
+        return self.image.url
+
+    def get_image_widths(self, image_format):
+        """[(ширина, URL)] копий для srcset в формате `image_format`."""
+        prefix = f'{image_format}-'
+        return sorted(
+            (int(variant[len(prefix):]), self.image.storage.url(name))
+            for variant, name in self.image_variants.items()
+            if variant.startswith(prefix)
+        )
+
+    @property
+    def image_sources(self):
+        """[(MIME-тип, srcset)] для <source> внутри <picture>."""
+        sources = []
+        for image_format, (*_, mime_type) in settings.IMAGE_FORMATS.items():
+            widths = self.get_image_widths(image_format)
+            if widths:
+                sources.append((mime_type, ', '.join(
+                    f'{url} {width}w' for width, url in widths
+                )))
+        return sources
+
+    @property
+    def card_image_url(self):
+        """JPEG-копия шириной с карточку для браузеров без srcset."""
+        widths = self.get_image_widths('jpeg')
+        if not widths:
+            return self.image.url
+        fitting = [url for width, url in widths
+                   if width <= settings.CARD_IMAGE_WIDTH]
+        return fitting[-1] if fitting else widths[0][1]
+
+    @property
+    def full_image_url(self):
+        """Самая крупная JPEG-копия — её открывает клик по изображению."""
+        widths = self.get_image_widths('jpeg')
+        return widths[-1][1] if widths else self.image.url
+
+    def save(self, *args, update_fields=None, **kwargs):
+        self.is_visible = (
+            self.is_published
+            and self.pub_date <= now()
+            and self.category is not None
+            and self.category.is_published
+        )
+        if update_fields:
+            # Частичное сохранение тоже меняет версию поста, а флаг
+            # видимости — если изменились поля, по которым он посчитан.
+            update_fields = {*update_fields, 'updated_at'}
+            if update_fields & {'is_published', 'pub_date', 'category',
+                                'category_id'}:
+                update_fields.add('is_visible')
+        super().save(*args, update_fields=update_fields, **kwargs)
+
 
 class Comment(models.Model):
+    # Комментарии могут храниться в отдельной базе (COMMENTS_DATABASE),
+    # поэтому внешние ключи без ограничений в БД, а каскадное удаление
+    # выполняют сигналы (blog/signals.py).
     text = models.TextField('Текст')
     post = models.ForeignKey(Post,
-                             on_delete=models.CASCADE,
+                             on_delete=models.DO_NOTHING,
+                             db_constraint=False,
                              verbose_name='публикация')
     author = models.ForeignKey(User,
-                               on_delete=models.CASCADE,
+                               on_delete=models.DO_NOTHING,
+                               db_constraint=False,
                                verbose_name='Автор комментария')
     created_at = models.DateTimeField(
         auto_now_add=True,
@@ -123,6 +245,62 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_thread_idx',
+            ),
+        )
 
     def __str__(self):
         return f'Комментарий пользователя {self.author}'
+
+
+class CommentThread(models.Model):
+    """Количество комментариев поста и версия их ветки.
+
+    Хранится рядом с комментариями (COMMENTS_DATABASE) и меняется сигналами
+    комментариев в их базе (blog/signals.py), так что запись комментария
+    не блокирует основную базу. Расхождения исправляет команда
+    `manage.py recount_comments`.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name='comment_thread',
+        verbose_name='публикация',
+    )
+    count = models.PositiveIntegerField('Количество комментариев', default=0)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'ветка комментариев'
+        verbose_name_plural = 'Ветки комментариев'
+
+
+class PostSearch(models.Model):
+    """Полнотекстовый индекс постов — виртуальная таблица FTS5 SQLite.
+
+    Таблицу создаёт миграция, заполняют сигналы (blog/services/search.py).
+    `rank` — скрытый столбец FTS5 с релевантностью (BM25, чем меньше,
+    тем лучше), доступен только в запросах с MATCH.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name='+',
+    )
+    title = models.TextField()
+    text = models.TextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'blog_post_search'
@@ -0,0 +1,115 @@
+"""Маршрутизация запросов между базами.
+
+Комментарии — самая частая запись — могут жить в отдельной базе
+`COMMENTS_DATABASE` (`CommentRouter`), чтобы их поток не блокировал запись
+постов и пользователей. Остальное `ReplicaRouter` пишет в основную базу.
+Читают из реплик только представления, которые явно это разрешили
+(`ReplicaReadMixin`), и только пока пользователь не закреплён
+за основной базой: после записи он несколько секунд читает из неё, чтобы
+сразу увидеть свои изменения (read-your-writes, см. blog/middleware.py).
+Реплики — копии основной базы, которые обновляет команда `sync_replicas`.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Разрешено ли текущему запросу читать из реплик.
+replica_reads = ContextVar('replica_reads', default=False)
+
+# Приложения, которые всегда читаются из основной базы: сессия должна
+# быть видна сразу после входа.
+PRIMARY_ONLY_APPS = ('sessions',)
+
+# Модели, которые хранятся в базе комментариев `COMMENTS_DATABASE`.
+COMMENT_MODELS = ('blog.comment', 'blog.commentthread')
+
+
+@contextmanager
+def read_from_replicas():
+    """Разрешает чтение из реплик внутри блока `with`."""
+    token = replica_reads.set(True)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+
+@contextmanager
+def read_from_primary():
+    """Запрещает чтение из реплик внутри блока `with`.
+
+    Для выборок, по которым пишут или которые кешируются для всех:
+    реплика может отставать.
+    """
+    token = replica_reads.set(False)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def get_comments_database():
+    return getattr(settings, 'COMMENTS_DATABASE', DEFAULT_DB_ALIAS)
+
+
+def is_comment(model):
+    """Комментарий или ветка комментариев поста — живут в одной базе."""
+    return model._meta.label_lower in COMMENT_MODELS
+
+
+class CommentRouter:
+    """Комментарии и их ветки (`COMMENT_MODELS`) — в базе `COMMENTS_DATABASE`.
+
+    В основной базе их таблицы тоже создаются (так проходят миграции
+    с данными), но остаются пустыми; в базу комментариев не попадает
+    ничего, кроме них.
+    """
+
+    def db_for_read(self, model, **hints):
+        if is_comment(model):
+            return get_comments_database()
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_comment(obj1) or is_comment(obj2):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        comments_database = get_comments_database()
+        if db == DEFAULT_DB_ALIAS or db != comments_database:
+            return None
+        return f'{app_label}.{model_name}' in COMMENT_MODELS
+
+
+class ReplicaRouter:
+    """Чтение из случайной реплики там, где это разрешено."""
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if (not replicas or not replica_reads.get()
+                or model._meta.app_label in PRIMARY_ONLY_APPS
+                # Внутри транзакции читаем то, что в ней уже записано.
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        return {obj1._state.db, obj2._state.db} <= databases
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема попадает в реплики вместе с данными.
+        return db not in get_replicas()
@@ -0,0 +1,48 @@
+"""Создание уменьшенных копий изображений.
+
+Модуль работает только с файлами и Pillow и не импортирует Django:
+его функции выполняются в пуле процессов (blog/services/thumbnails.py,
+команда `backfill_thumbnails`). Процессы пула запускаются заново
+(`mp_context`), а не копией процесса сервера: копия унаследовала бы его
+соединения с базой, потоки (например, писателя, blog/services/writer.py)
+и занятые ими блокировки.
+"""
+import multiprocessing
+import os
+
+from PIL import Image, ImageOps
+
+mp_context = multiprocessing.get_context('spawn')
+
+
+def render_thumbnails(source, targets):
+    """Сохраняет уменьшенные копии изображения `source`.
+
+    `targets` — {вариант: (путь к файлу, (ширина, высота), формат Pillow,
+    параметры сохранения)}; пропорции сохраняются, изображение только
+    уменьшается, метаданные (EXIF, ICC) в копии не попадают. Из копий
+    по ширине создаются только те, что уже оригинала, и одна не уже него
+    (она получается шириной с оригинал).
+    Возвращает {вариант: ширина созданной копии}.
+    """
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+    image.info.clear()
+    widths = sorted({
+        size[0] for _, size, *_ in targets.values() if size[1] is None
+    })
+    needed = [width for width in widths if width < image.width]
+    needed += [width for width in widths if width >= image.width][:1]
+    rendered = {}
+    for variant, (path, (width, height), image_format,
+                  options) in targets.items():
+        if height is None:
+            if width not in needed:
+                continue
+            height = image.height
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        thumbnail = image.copy()
+        thumbnail.thumbnail((width, height), Image.LANCZOS)
+        thumbnail.save(path, image_format, **options)
+        rendered[variant] = thumbnail.width
+    return rendered
@@ -0,0 +1,97 @@
+"""Кеш целых страниц лент для анонимных пользователей.
+
+Каждая запись помечена версией лент, которую сигналы (blog/signals.py)
+меняют при любом изменении постов, комментариев, категорий,
+местоположений и авторов — после фиксации транзакции, иначе страницу
+успели бы построить по старым строкам и сохранить под новой версией.
+Устаревшую запись перестраивает только один процесс, остальные в это
+время отдают прежнюю копию (stale-while-revalidate). Кроме того, запись
+живёт не дольше `PAGE_CACHE_TIMEOUT`. Между процессами это работает при
+общем бэкенде кеша (в профиле production, см. blogicum/settings.py);
+`LocMemCache` у каждого процесса свой.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import transaction
+
+from blog import settings
+
+FEED_VERSION_CACHE_KEY = 'blog:feed-version'
+# Параметры запроса, от которых зависит страница ленты; остальные в ключ
+# кеша не входят, чтобы произвольные параметры не плодили записи.
+PAGE_CACHE_PARAMS = ('page', 'cursor')
+
+
+def get_feed_version():
+    """Текущая версия лент."""
+    version = cache.get(FEED_VERSION_CACHE_KEY)
+    if version is None:
+        version = bump_feed_version()
+    return version
+
+
+def bump_feed_version():
+    """Объявляет все закешированные страницы лент устаревшими.
+
+    Версия — время изменения в наносекундах, поэтому она растёт
+    и по ней же можно судить о времени последнего изменения лент.
+    """
+    version = time.time_ns()
+    cache.set(FEED_VERSION_CACHE_KEY, version, None)
+    return version
+
+
+def invalidate_feed_pages(using=None):
+    """Меняет версию лент после фиксации текущей транзакции базы `using`.
+
+    Вне транзакции версия меняется сразу.
+    """
+    transaction.on_commit(bump_feed_version, using=using)
+
+
+def get_page_cache_key(request):
+    """Ключ кеша страницы: путь и известные параметры запроса."""
+    params = urlencode([(name, request.GET[name])
+                        for name in PAGE_CACHE_PARAMS
+                        if name in request.GET])
+    path = f'{request.path}?{params}'
+    return f'blog:page:{hashlib.md5(path.encode()).hexdigest()}'
+
+
+def get_cached_page(request, render):
+    """Отдаёт страницу из кеша или строит её вызовом `render()`.
+
+    Кешируются только успешные ответы. У ответа `feed_version` — версия
+    лент, по которой он построен: пока страницу перестраивает другой
+    процесс, это прежняя версия, и валидаторы ответа должны считаться
+    по ней (blog/mixins.py).
+    """
+    key = get_page_cache_key(request)
+    lock_key = f'{key}:lock'
+    version = get_feed_version()
+    entry = cache.get(key)
+    locked = False
+    if entry is not None:
+        entry_version, response = entry
+        response.feed_version = entry_version
+        if entry_version == version:
+            return response
+        locked = cache.add(lock_key, True, settings.PAGE_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            # Страницу уже перестраивает другой процесс.
+            return response
+    try:
+        response = render()
+        if hasattr(response, 'render'):
+            response.render()
+        if response.status_code == 200:
+            cache.set(key, (version, response),
+                      settings.PAGE_CACHE_TIMEOUT)
+        response.feed_version = version
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return response
@@ -0,0 +1,203 @@
+"""Постраничный вывод по ключу сортировки (keyset/cursor pagination).
+
+В отличие от стандартного `Paginator`, не выполняет `COUNT(*)` и не
+использует `OFFSET`: следующая страница выбирается условием «строго после
+последней записи текущей страницы» по полям сортировки, поэтому стоимость
+запроса не зависит от глубины страницы.
+"""
+import datetime
+from collections.abc import Sequence
+
+from django.core import signing
+from django.core.paginator import InvalidPage, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+CURSOR_SALT = 'blog.cursor'
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Кодирует дату и время без потери микросекунд.
+
+    `DjangoJSONEncoder` округляет время до миллисекунд, а ключ курсора
+    должен совпадать со значением в базе точно.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorSerializer(signing.JSONSerializer):
+    """Сериализатор курсора, понимающий даты и время."""
+
+    def dumps(self, obj):
+        return CursorEncoder(separators=(',', ':')).encode(obj).encode(
+            'latin-1'
+        )
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации."""
+
+    def __init__(self, object_list, paginator,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class HydratingPaginator(Paginator):
+    """Двухфазная постраничная пагинация.
+
+    Для подсчёта и выбора страницы используется узкий запрос только по
+    `pk`, а полные объекты загружает `hydrate(ids)` — и только для записей
+    текущей страницы, в порядке `ids`.
+    """
+
+    def __init__(self, object_list, per_page, hydrate, **kwargs):
+        super().__init__(
+            object_list.values_list('pk', flat=True), per_page, **kwargs
+        )
+        self.hydrate = hydrate
+
+    def _get_page(self, object_list, number, paginator):
+        return super()._get_page(
+            self.hydrate(list(object_list)), number, paginator
+        )
+
+
+class CursorPaginator:
+    """Пагинатор по ключу `ordering`.
+
+    Последнее поле `ordering` должно быть уникальным (обычно `id`), иначе
+    записи с одинаковым ключом могут потеряться на границе страниц.
+    Курсоры подписываются, так что для клиента они непрозрачны.
+    Если задан `hydrate`, страница выбирается узким запросом по ключу,
+    а объекты загружаются отдельно, как в `HydratingPaginator`.
+    """
+
+    cursor_based = True
+
+    def __init__(self, object_list, per_page, ordering, hydrate=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.hydrate = hydrate
+
+    def page(self, cursor=None):
+        """Возвращает страницу после (или перед) позиции курсора."""
+        direction, values = NEXT, None
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+        backwards = direction == PREVIOUS
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+        ordering = self.ordering
+        if backwards:
+            ordering = [self._invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        names = [self._name(field) for field in self.ordering]
+        if self.hydrate is not None:
+            queryset = queryset.values_list('pk', *names)
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        if self.hydrate is not None:
+            keys = [row[1:] for row in rows]
+            object_list = self.hydrate([row[0] for row in rows])
+        else:
+            keys = [[getattr(row, name) for name in names] for row in rows]
+            object_list = rows
+        return CursorPage(
+            object_list,
+            self,
+            next_cursor=(self.encode_cursor(keys[-1], NEXT)
+                         if has_next and rows else None),
+            previous_cursor=(self.encode_cursor(keys[0], PREVIOUS)
+                             if has_previous and rows else None),
+        )
+
+    def encode_cursor(self, values, direction):
+        return signing.dumps([direction, list(values)], salt=CURSOR_SALT,
+                             serializer=CursorSerializer)
+
+    def decode_cursor(self, cursor):
+        try:
+            direction, values = signing.loads(cursor, salt=CURSOR_SALT,
+                                              serializer=CursorSerializer)
+        except (signing.BadSignature, TypeError, ValueError):
+            raise InvalidCursor('Неверный курсор страницы.')
+        if direction not in (NEXT, PREVIOUS) or (
+                len(values) != len(self.ordering)):
+            raise InvalidCursor('Неверный курсор страницы.')
+        model = self.object_list.model
+        try:
+            values = [
+                model._meta.get_field(self._name(field)).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise InvalidCursor('Неверный курсор страницы.')
+        return direction, values
+
+    def _seek(self, values, backwards):
+        """Условие «после ключа `values`» в порядке сортировки.
+
+        Первое поле ограничено ещё и нестрогим неравенством, чтобы база
+        могла начать просмотр индекса сразу с нужной позиции.
+        """
+        names = [self._name(field) for field in self.ordering]
+        lookups = [self._lookup(field, backwards) for field in self.ordering]
+        condition = Q()
+        for position, (name, lookup) in enumerate(zip(names, lookups)):
+            step = Q(**{f'{name}__{lookup}': values[position]})
+            for prefix, value in zip(names[:position], values):
+                step &= Q(**{prefix: value})
+            condition |= step
+        return Q(**{f'{names[0]}__{lookups[0]}e': values[0]}) & condition
+
+    @staticmethod
+    def _name(field):
+        return field.lstrip('-')
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _lookup(field, backwards):
+        return 'lt' if field.startswith('-') != backwards else 'gt'
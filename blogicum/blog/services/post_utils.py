@@ -1,22 +1,182 @@
 """Вспомогательные функции для обработки постов."""
-from django.db.models import Count
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.dispatch import Signal
 from django.utils.timezone import now
 
-from blog.models import Post
+from blog.models import Comment, CommentThread, Post
+from blog.routers import read_from_primary
+
+# Порядок постов в лентах; `id` делает ключ сортировки уникальным,
+# что нужно для курсорной пагинации и стабильного порядка страниц.
+FEED_ORDERING = ('-pub_date', '-id')
+
+# Порядок комментариев к посту (ключ курсорной пагинации ветки):
+COMMENT_ORDERING = ('created_at', 'id')
+
+NEXT_PUBLICATION_CACHE_KEY = 'blog:next-publication'
+
+# Отправляется после того, как у постов наступила дата публикации;
+# аргумент `post_ids` — список их идентификаторов.
+posts_published = Signal()
+
+
+def visible_condition():
+    """Условие видимости поста, денормализованное в `Post.is_visible`."""
+    return Q(is_published=True, pub_date__lte=now(),
+             category__is_published=True)
+
+
+def get_next_publication(use_cache=True):
+    """Дата ближайшей отложенной публикации или `None`.
+
+    Значение кешируется без срока давности: кеш сбрасывается при сохранении
+    или удалении любого поста, сохранении категории и после каждой
+    публикации по расписанию.
+    """
+    next_pub_date = False
+    if use_cache:
+        next_pub_date = cache.get(NEXT_PUBLICATION_CACHE_KEY, False)
+    if next_pub_date is False:
+        next_pub_date = Post.objects.filter(
+            is_visible=False,
+            is_published=True,
+            pub_date__gt=now(),
+            category__is_published=True,
+        ).aggregate(next_pub_date=Min('pub_date'))['next_pub_date']
+        cache.set(NEXT_PUBLICATION_CACHE_KEY, next_pub_date, None)
+    return next_pub_date
+
+
+def publish_due_posts():
+    """Делает видимыми посты, дата публикации которых наступила.
+
+    Возвращает количество опубликованных постов.
+    """
+    with transaction.atomic():
+        post_ids = list(Post.objects.filter(
+            visible_condition(), is_visible=False,
+        ).values_list('pk', flat=True))
+        Post.objects.filter(pk__in=post_ids).update(
+            is_visible=True, updated_at=now()
+        )
+    cache.delete(NEXT_PUBLICATION_CACHE_KEY)
+    if post_ids:
+        posts_published.send(sender=Post, post_ids=post_ids)
+    return len(post_ids)
+
+
+def activate_scheduled_posts():
+    """Публикует посты по расписанию, если ближайшая дата уже наступила.
+
+    Пока она не наступила, стоит одного обращения к кешу, поэтому
+    вызывается на каждом чтении лент: так посты появляются вовремя, даже
+    если команда `publish_scheduled` не запущена. Дата кешируется для всех
+    процессов, а публикация пишет в базу, поэтому обе читают основную
+    базу, а не реплику.
+    """
+    with read_from_primary():
+        next_pub_date = get_next_publication()
+        if next_pub_date is not None and next_pub_date <= now():
+            publish_due_posts()
+
+
+def sync_post_visibility(posts=Post.objects.all()):
+    """Массовый пересчёт `is_visible` для `posts`.
+
+    Обновляются только посты, у которых флаг разошёлся с условием.
+    """
+    visible = visible_condition()
+    posts.filter(visible).exclude(is_visible=True).update(
+        is_visible=True, updated_at=now()
+    )
+    posts.exclude(visible).exclude(is_visible=False).update(
+        is_visible=False, updated_at=now()
+    )
+
+
+def touch_posts(posts):
+    """Меняет версию (`updated_at`) постов, чтобы сбросить их кеш."""
+    posts.update(updated_at=now())
+
+
+def touch_threads(threads):
+    """Меняет версию (`updated_at`) веток комментариев `threads`."""
+    threads.update(updated_at=now())
 
 
 def filter_published_posts(posts=Post.objects.all()):
-    """Отбор только опубликованных постов."""
-    return posts.filter(
-        is_published=True,
-        pub_date__lte=now(),
-        category__is_published=True,)
+    """Отбор только опубликованных постов.
+
+    Условие видимости хранится в самом посте, поэтому запрос не присоединяет
+    таблицу категорий и обслуживается частичным индексом.
+    """
+    activate_scheduled_posts()
+    return posts.filter(is_visible=True)
 
 
-def annotate_comment_count(posts=Post.objects.all()):
-    """Аннотирование постов количеством комментариев и сортировка."""
+def select_post_related(posts=Post.objects.all()):
+    """Подгрузка связанных объектов постов и сортировка ленты.
+
+    Таблицу комментариев не присоединяет: она может быть в другой базе,
+    количество комментариев подставляет `attach_comment_threads`.
+    """
     return posts.select_related(
         'author', 'category', 'location',
-    ).annotate(
-        comment_count=Count('comments')
-    ).order_by('-pub_date')
+    ).order_by(*FEED_ORDERING)
+
+
+def hydrate_posts(ids):
+    """Загрузка постов по списку `ids` одним запросом, в порядке `ids`.
+
+    Вторая фаза выборки ленты: первая (узкая) выбирает только
+    идентификаторы постов страницы, см. `HydratingPaginator`.
+    """
+    posts = select_post_related(
+        Post.objects.filter(pk__in=ids)
+    ).order_by().in_bulk()
+    return attach_comment_threads([posts[pk] for pk in ids if pk in posts])
+
+
+def attach_comment_threads(posts):
+    """Подставляет постам `comment_count` из их веток комментариев.
+
+    Ветки загружаются одним запросом к базе комментариев.
+    """
+    counts = dict(CommentThread.objects.filter(
+        pk__in=[post.pk for post in posts]
+    ).values_list('pk', 'count'))
+    for post in posts:
+        post.comment_count = counts.get(post.pk, 0)
+    return posts
+
+
+def recount_comments(posts=Post.objects.all()):
+    """Пересчёт счётчиков веток комментариев, которые разошлись.
+
+    Комментарии и ветки живут в своей базе, поэтому посты, комментарии
+    и ветки читаются отдельными запросами, без подзапросов между базами.
+    Возвращает количество исправленных постов.
+    """
+    actual_counts = dict(
+        Comment.objects.order_by().values_list('post_id')
+        .annotate(count=Count('pk'))
+    )
+    stored_counts = dict(CommentThread.objects.values_list('pk', 'count'))
+    drifted = defaultdict(list)
+    for pk in posts.values_list('pk', flat=True).iterator():
+        actual_count = actual_counts.get(pk, 0)
+        if stored_counts.get(pk, 0) != actual_count:
+            drifted[actual_count].append(pk)
+    for actual_count, pks in drifted.items():
+        CommentThread.objects.bulk_create(
+            [CommentThread(post_id=pk) for pk in pks
+             if pk not in stored_counts],
+        )
+        CommentThread.objects.filter(pk__in=pks).update(
+            count=actual_count, updated_at=now()
+        )
+    return sum(map(len, drifted.values()))
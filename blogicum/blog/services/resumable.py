@@ -0,0 +1,197 @@
+"""Докачиваемые загрузки изображений (протокол tus 1.0, без расширений
+кроме creation и termination).
+
+Клиент создаёт загрузку, объявив её размер, и отправляет файл частями:
+каждая PATCH-часть дописывается к файлу на диске с указанного смещения.
+После обрыва связи клиент узнаёт смещение (HEAD) и досылает только
+недостающие байты. Готовую загрузку форма поста принимает по токену
+вместо файла (`PostForm.upload_token`); при сохранении поста файл
+перемещается в хранилище без копирования.
+
+Загрузки лежат в `RESUMABLE_UPLOAD_DIR`: `<токен>` — данные,
+`<токен>.json` — размер, владелец и имя файла. Брошенные загрузки
+удаляет команда `manage.py purge_uploads`.
+"""
+import base64
+import binascii
+import json
+import os
+import posixpath
+import secrets
+import time
+
+from django.conf import settings as django_settings
+from django.core.files.uploadedfile import UploadedFile
+
+from blog import settings
+from blog.uploads import get_upload_max_bytes
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: части одной загрузки не защищены от одновременной записи.
+    fcntl = None
+
+TUS_VERSION = '1.0.0'
+TUS_EXTENSIONS = 'creation,termination'
+READ_CHUNK_SIZE = 64 * 2 ** 10
+
+
+class UploadError(Exception):
+    """Запрос к загрузке не выполнен; `status` — HTTP-код ответа."""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+class AssembledFile(UploadedFile):
+    """Собранная загрузка, которую принимает `ImageField` формы."""
+
+    def __init__(self, path, name, size):
+        super().__init__(open(path, 'rb'), name, None, size)
+        self.path = path
+
+    def temporary_file_path(self):
+        # Хранилище перемещает такие файлы, а не копирует.
+        return self.path
+
+
+class ResumableUpload:
+
+    def __init__(self, token, meta):
+        self.token = token
+        self.meta = meta
+        self.path = os.path.join(get_upload_dir(), token)
+
+    @property
+    def length(self):
+        return self.meta['length']
+
+    @property
+    def offset(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    @property
+    def finished(self):
+        return self.offset == self.length
+
+    def append(self, offset, stream, size):
+        """Дописывает `size` байт из `stream` со смещения `offset`."""
+        if size > settings.RESUMABLE_CHUNK_MAX_BYTES:
+            raise UploadError('Слишком большая часть загрузки.', 413)
+        with open(self.path, 'ab') as data:
+            if fcntl is not None:
+                fcntl.flock(data, fcntl.LOCK_EX)
+            # Смещение сверяется под блокировкой: две параллельные части
+            # с одним смещением не запишутся обе.
+            if offset != data.seek(0, os.SEEK_END):
+                raise UploadError('Смещение не совпадает с загруженным.', 409)
+            if offset + size > self.length:
+                raise UploadError('Часть выходит за размер загрузки.', 413)
+            remaining = size
+            while remaining:
+                chunk = stream.read(min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    # Связь оборвалась: принятое остаётся, клиент дошлёт.
+                    break
+                data.write(chunk)
+                remaining -= len(chunk)
+            return data.tell()
+
+    def open(self):
+        return AssembledFile(self.path, self.meta['filename'], self.length)
+
+    def delete(self):
+        for path in (self.path, get_meta_path(self.token)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def parse_metadata(header):
+    """Разбирает заголовок Upload-Metadata: «ключ base64,ключ base64»."""
+    metadata = {}
+    for pair in filter(None, header.split(',')):
+        key, _, value = pair.strip().partition(' ')
+        try:
+            metadata[key] = base64.b64decode(value).decode()
+        except (binascii.Error, UnicodeDecodeError):
+            raise UploadError('Неверный заголовок Upload-Metadata.', 400)
+    return metadata
+
+
+def get_upload_dir():
+    directory = django_settings.RESUMABLE_UPLOAD_DIR
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def get_meta_path(token):
+    return os.path.join(get_upload_dir(), f'{token}.json')
+
+
+def create_upload(user, length, filename):
+    """Создаёт пустую загрузку размером `length` байт."""
+    max_bytes = get_upload_max_bytes()
+    if length < 1 or max_bytes is not None and length > max_bytes:
+        raise UploadError('Недопустимый размер загрузки.', 413)
+    token = secrets.token_urlsafe(24)
+    meta = {
+        'user': user.pk,
+        'length': length,
+        'filename': posixpath.basename(filename.replace('\\', '/'))
+        or 'image',
+        'created': time.time(),
+    }
+    with open(get_meta_path(token), 'x') as meta_file:
+        json.dump(meta, meta_file)
+    upload = ResumableUpload(token, meta)
+    open(upload.path, 'xb').close()
+    return upload
+
+
+def get_upload(token, user_id):
+    """Загрузка пользователя `user_id` по токену или None."""
+    if not (token and token.isascii()
+            and token.replace('-', '').replace('_', '').isalnum()):
+        return None
+    try:
+        with open(get_meta_path(token)) as meta_file:
+            meta = json.load(meta_file)
+    except (FileNotFoundError, ValueError):
+        return None
+    if meta['user'] != user_id:
+        return None
+    return ResumableUpload(token, meta)
+
+
+def purge_uploads(max_age=settings.RESUMABLE_UPLOAD_TTL):
+    """Удаляет загрузки, которые не менялись дольше `max_age` секунд.
+
+    Возраст считается по последнему изменению файлов загрузки: живая,
+    но медленная загрузка дописывает данные и не удаляется. Так же
+    удаляются и осиротевшие файлы — данные без метаданных и наоборот.
+    Возвращает число удалённых загрузок.
+    """
+    deadline = time.time() - max_age
+    modified = {}
+    for entry in os.scandir(get_upload_dir()):
+        token, extension = os.path.splitext(entry.name)
+        if extension not in ('', '.json'):
+            continue
+        try:
+            mtime = entry.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        modified[token] = max(mtime, modified.get(token, 0))
+    purged = 0
+    for token, mtime in modified.items():
+        if mtime < deadline:
+            ResumableUpload(token, {}).delete()
+            purged += 1
+    return purged
@@ -0,0 +1,77 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+Индекс — виртуальная таблица `blog_post_search` (модель `PostSearch`):
+токенизатор unicode61 приводит кириллицу к нижнему регистру, а «ё»
+заменяется на «е» здесь, при индексации и в запросах. Стеммера для
+русского в FTS5 нет, поэтому каждое слово запроса ищется как префикс:
+«лес» находит «леса» и «лесной». Заголовок весит больше текста (см.
+миграцию 0018). Видимость постов проверяется при поиске, поэтому
+в индекс попадают все посты.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+from blog.models import PostSearch
+from blog.services.post_utils import filter_published_posts
+
+# Порядок результатов: по релевантности, `post` (rowid) — уникальный хвост
+# ключа для курсорной пагинации.
+SEARCH_ORDERING = ('rank', 'post')
+
+WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def build_match_query(query):
+    """Запрос FTS5 из пользовательского ввода: все слова как префиксы.
+
+    Слова берутся в кавычки, так что синтаксис FTS5 во вводе не работает
+    и не ломает запрос. Возвращает None, если слов нет.
+    """
+    words = WORD.findall(normalize(query))
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def match_posts(query):
+    """Записи индекса, подходящие под запрос, без учёта видимости."""
+    match_query = build_match_query(query)
+    if match_query is None:
+        return PostSearch.objects.none()
+    return PostSearch.objects.filter(RawSQL(
+        f'"{PostSearch._meta.db_table}" MATCH %s', (match_query,),
+        output_field=BooleanField(),
+    ))
+
+
+def search_posts(query):
+    """Опубликованные посты по запросу; сортируйте по SEARCH_ORDERING."""
+    return match_posts(query).filter(
+        post__in=filter_published_posts().values('pk')
+    )
+
+
+def index_post(post):
+    """Добавляет пост в индекс или обновляет его запись."""
+    table = PostSearch._meta.db_table
+    with connections[post._state.db].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', (post.pk,))
+        cursor.execute(
+            f'INSERT INTO {table} (rowid, title, text) VALUES (%s, %s, %s)',
+            (post.pk, normalize(post.title), normalize(post.text)),
+        )
+
+
+def unindex_post(post):
+    with connections[post._state.db].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {PostSearch._meta.db_table} WHERE rowid = %s',
+            (post.pk,),
+        )
@@ -0,0 +1,193 @@
+"""Уменьшенные копии изображений постов.
+
+Ленты, страница поста и админка показывают не оригинал загруженного
+изображения, а его копии без EXIF (см. `Post.image_variants`):
+- для админки — копии размеров из `THUMBNAIL_SIZES`;
+- для srcset — копии ширин `IMAGE_WIDTHS` в каждом формате из
+  `IMAGE_FORMATS` (WebP и прогрессивный JPEG для остальных браузеров).
+Копии создаются после фиксации сохранения поста с новым изображением
+(blog/signals.py): при `IMAGE_WORKERS` > 0 — в пуле процессов, не
+задерживая запрос, иначе сразу. Для уже загруженных изображений есть
+команда `manage.py backfill_thumbnails`. Сами копии создаёт
+`render_thumbnails` из blog/services/imaging.py — модуля без Django.
+
+Изображения и копии, которые больше не нужны ни одному посту, удаляет
+`purge_media` (команда `manage.py purge_media`), см. blog/storage.py.
+"""
+import os
+import posixpath
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings as django_settings
+from django.db import close_old_connections
+from django.utils.timezone import now
+from PIL import Image
+
+from blog import settings
+from blog.models import Post
+from blog.services.imaging import mp_context, render_thumbnails
+from blog.services.page_cache import invalidate_feed_pages
+from blog.services.writer import run_write
+
+THUMBNAILS_DIR = 'thumbnails'
+THUMBNAIL_FORMAT = 'jpeg'
+
+
+def get_variants():
+    """{вариант: ((ширина, высота), формат)} для всех копий изображения.
+
+    Высота None у копий для srcset: они ограничены только по ширине.
+    """
+    variants = {
+        variant: (size, THUMBNAIL_FORMAT)
+        for variant, size in settings.THUMBNAIL_SIZES.items()
+    }
+    for image_format in settings.IMAGE_FORMATS:
+        for width in settings.IMAGE_WIDTHS:
+            variants[f'{image_format}-{width}'] = ((width, None), image_format)
+    return variants
+
+
+def get_variant_names(image_name):
+    """Имена файлов копий в хранилище: рядом с оригиналом."""
+    directory, filename = posixpath.split(image_name)
+    stem = posixpath.splitext(filename)[0]
+    names = {}
+    for variant, ((width, height), image_format) in get_variants().items():
+        folder = variant if height is not None else str(width)
+        extension = settings.IMAGE_FORMATS[image_format][2]
+        names[variant] = posixpath.join(directory, THUMBNAILS_DIR, folder,
+                                        f'{stem}.{extension}')
+    return names
+
+
+def plan_thumbnails(post):
+    """Аргументы `render_thumbnails` и имена копий для поста."""
+    names = get_variant_names(post.image.name)
+    storage = post.image.storage
+    targets = {}
+    for variant, (size, image_format) in get_variants().items():
+        pillow_format, options, *_ = settings.IMAGE_FORMATS[image_format]
+        targets[variant] = (storage.path(names[variant]), size,
+                            pillow_format, options)
+    return (post.image.path, targets), names
+
+
+def get_rendered_variants(names, rendered):
+    """`Post.image_variants` по результату `render_thumbnails`.
+
+    Копии для srcset называются по фактической ширине: копия узкого
+    оригинала получается уже заказанной и в srcset должна объявлять
+    свою ширину. Имена файлов остаются заказанными.
+    """
+    variants = {}
+    for variant, ((width, height), image_format) in get_variants().items():
+        if variant not in rendered:
+            continue
+        if height is None:
+            variants[f'{image_format}-{rendered[variant]}'] = names[variant]
+        else:
+            variants[variant] = names[variant]
+    return variants
+
+
+def get_image_storage():
+    return Post._meta.get_field('image').storage
+
+
+def save_variants(post_id, image_name, variants):
+    """Записывает копии в пост, если изображение не сменилось.
+
+    Копии, которые успела удалить `purge_media`, не записываются.
+    """
+    storage = get_image_storage()
+    variants = {
+        variant: name for variant, name in variants.items()
+        if storage.retain(name)
+    }
+    updated = Post.objects.filter(pk=post_id, image=image_name).update(
+        image_variants=variants, updated_at=now(),
+    )
+    if updated:
+        invalidate_feed_pages()
+    return updated
+
+
+def purge_media(grace=settings.MEDIA_PURGE_GRACE):
+    """Удаляет изображения и копии, на которые не ссылается ни один пост.
+
+    Одинаковые изображения хранятся одним файлом (blog/storage.py), поэтому
+    файл нельзя удалить вместе с постом: он может быть общим. Удаляются
+    только файлы, которые не менялись дольше `grace` секунд: файл, только
+    что сохранённый для поста, который ещё не зафиксирован, обновлён
+    при сохранении. Возвращает количество удалённых файлов.
+    """
+    storage = get_image_storage()
+    deadline = time.time() - grace
+    referenced = set()
+    for image, variants in Post.objects.exclude(image='').values_list(
+            'image', 'image_variants').iterator():
+        referenced.add(image)
+        referenced.update(variants.values())
+    upload_to = Post._meta.get_field('image').upload_to
+    purged = 0
+    for root, _, filenames in os.walk(storage.path(upload_to)):
+        for filename in filenames:
+            name = posixpath.join(
+                *os.path.relpath(root, storage.location).split(os.sep),
+                filename,
+            )
+            if name not in referenced and storage.purge(name, deadline):
+                purged += 1
+    return purged
+
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=django_settings.IMAGE_WORKERS,
+            mp_context=mp_context,
+        )
+    return _pool
+
+
+def generate_thumbnails(post):
+    """Создаёт копии изображения поста — в пуле процессов или сразу."""
+    if not post.image:
+        return
+    shared = (
+        Post.objects.filter(image=post.image.name).exclude(pk=post.pk)
+        .exclude(image_variants={})
+        .values_list('image_variants', flat=True).first()
+    )
+    storage = get_image_storage()
+    if shared and all(map(storage.retain, shared.values())):
+        # То же изображение уже есть у другого поста вместе с копиями.
+        save_variants(post.pk, post.image.name, shared)
+        return
+    arguments, names = plan_thumbnails(post)
+    if not getattr(django_settings, 'IMAGE_WORKERS', 0):
+        try:
+            rendered = render_thumbnails(*arguments)
+        except (OSError, Image.DecompressionBombError):
+            # Как и в пуле: без копий пост показывает оригинал.
+            return
+        save_variants(post.pk, post.image.name,
+                      get_rendered_variants(names, rendered))
+        return
+
+    def store(future):
+        if future.exception() is not None:
+            return
+        try:
+            run_write(save_variants, post.pk, post.image.name,
+                      get_rendered_variants(names, future.result()))
+        finally:
+            close_old_connections()
+
+    get_pool().submit(render_thumbnails, *arguments).add_done_callback(store)
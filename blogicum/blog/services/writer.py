@@ -0,0 +1,142 @@
+"""Единственный писатель в базу на процесс.
+
+SQLite допускает одну пишущую транзакцию на файл. Когда запросы пишут
+сами, они состязаются за блокировку, ждут `busy_timeout` и получают
+«database is locked». Координатор записи выстраивает записи процесса
+в очередь: их выполняет один поток короткими транзакциями, объединяя
+подряд пришедшие операции в одну транзакцию (каждая — в своей точке
+сохранения, так что ошибка одной не отменяет остальные). Вызывающий
+поток ждёт результата своей операции.
+
+Включается настройкой `WRITE_COORDINATOR` (blogicum/settings.py);
+без неё `run_write()` просто выполняет операцию на месте. Координатору
+передаются только обращения к базе: разбор запроса, сохранение файлов
+(`store_files()`) и ответ остаются в потоке запроса с его контекстом.
+"""
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings as django_settings
+from django.db import close_old_connections, connection, models, transaction
+
+from blog import settings
+
+
+class WriteCoordinator:
+    """Очередь записей, которую выполняет отдельный поток."""
+
+    def __init__(self, batch_size=settings.WRITE_BATCH_SIZE,
+                 batch_window=settings.WRITE_BATCH_WINDOW):
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        # Количество выполненных транзакций — для мониторинга и тестов.
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name='blog-writer', daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, operation, *args, **kwargs):
+        """Ставит операцию в очередь и ждёт её результата."""
+        if threading.current_thread() is self._thread:
+            # Запись изнутри другой записи: она уже в транзакции писателя.
+            return operation(*args, **kwargs)
+        future = Future()
+        self._queue.put((future, operation, args, kwargs))
+        return future.result()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get(timeout=self.batch_window))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            outcomes = []
+            try:
+                with transaction.atomic():
+                    for future, operation, args, kwargs in batch:
+                        try:
+                            with transaction.atomic():
+                                outcomes.append(
+                                    (future, operation(*args, **kwargs), None)
+                                )
+                        except Exception as error:
+                            outcomes.append((future, None, error))
+            except Exception as error:
+                # Не удалось зафиксировать транзакцию: не записалось ничего.
+                outcomes = [(future, None, error) for future, *_ in batch]
+            finally:
+                self.batches += 1
+                close_old_connections()
+            for future, result, error in outcomes:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+
+_coordinator = None
+_coordinator_pid = None
+_coordinator_lock = threading.Lock()
+
+
+def get_write_coordinator():
+    """Координатор текущего процесса (создаётся заново после fork)."""
+    global _coordinator, _coordinator_pid
+    with _coordinator_lock:
+        if _coordinator is None or _coordinator_pid != os.getpid():
+            _coordinator = WriteCoordinator()
+            _coordinator_pid = os.getpid()
+        return _coordinator
+
+
+def write_coordinator_enabled():
+    return getattr(django_settings, 'WRITE_COORDINATOR', False)
+
+
+def run_write(operation, *args, **kwargs):
+    """Выполняет пишущую операцию через координатор записи.
+
+    Если координатор выключен или вызывающий уже внутри транзакции
+    (ждать в ней писателя значило бы заблокировать его), операция
+    выполняется на месте.
+    """
+    if not write_coordinator_enabled() or connection.in_atomic_block:
+        return operation(*args, **kwargs)
+    return get_write_coordinator().submit(operation, *args, **kwargs)
+
+
+def submit_write(operation, *args, **kwargs):
+    """Как `run_write()`, но передаёт операцию координатору и изнутри
+    транзакции.
+
+    Для представлений, которые открывают транзакцию сами (админка), но
+    пишут только через координатор: их транзакция должна только читать.
+    Координатор включается вместе с журналом WAL (профиль production),
+    в котором читающая транзакция не мешает писателю зафиксировать запись.
+    """
+    if not write_coordinator_enabled():
+        return operation(*args, **kwargs)
+    return get_write_coordinator().submit(operation, *args, **kwargs)
+
+
+def store_files(instance):
+    """Сохраняет в хранилище новые файлы `instance` до его записи.
+
+    То же делает `FileField.pre_save()`, но в потоке писателя копирование
+    и хеширование файла задерживало бы все записи пакета.
+    """
+    for field in instance._meta.concrete_fields:
+        if isinstance(field, models.FileField):
+            file = getattr(instance, field.attname)
+            if file and not file._committed:
+                file.save(file.name, file.file, save=False)
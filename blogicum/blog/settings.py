@@ -15,6 +15,82 @@ LOCATION_PREVIEW_LENGTH = 20
 # Количество постов на одной странице (пагинация):
 POSTS_PER_PAGE = 10
 
+# Количество комментариев в одной порции на странице поста
+# (следующие подгружаются кнопкой «Показать ещё»):
+COMMENTS_PER_PAGE = 20
+
+# Способ пагинации лент постов:
+# 'pages' — нумерованные страницы (?page=N, с подсчётом общего числа постов),
+# 'cursor' — переход «вперёд/назад» по непрозрачному курсору (?cursor=...),
+# без COUNT и OFFSET; скорость не зависит от глубины страницы.
+POSTS_PAGINATION = 'pages'
+
+# Сколько секунд страница ленты хранится в кеше страниц, даже если контент
+# не менялся:
+PAGE_CACHE_TIMEOUT = 10 * 60
+
+# Сколько секунд один процесс может перестраивать устаревшую страницу из кеша
+# страниц, пока остальные отдают её прежнюю копию:
+PAGE_CACHE_LOCK_TIMEOUT = 30
+
+# Координатор записи (blog/services/writer.py): сколько операций одна
+# транзакция может объединить и сколько секунд ждать следующую операцию:
+WRITE_BATCH_SIZE = 50
+WRITE_BATCH_WINDOW = 0.002
+
+# Сколько секунд после записи пользователь читает только из основной базы,
+# а не из реплик (должно перекрывать интервал `sync_replicas`), и имя cookie,
+# которая его закрепляет:
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'primary_pin'
+
+# Размер пула потоков асинхронных представлений (blog/async_views.py):
+# сколько запросов одновременно работают с базой под ASGI.
+ASYNC_DB_THREADS = 8
+
+# Уменьшенные копии изображений постов (blog/services/thumbnails.py):
+# вариант — наибольшие ширина и высота; пропорции сохраняются.
+THUMBNAIL_SIZES = {
+    'admin': (300, 300),
+}
+THUMBNAIL_QUALITY = 85
+# Ширины копий для srcset карточек и страницы поста; каждая сохраняется
+# во всех форматах IMAGE_FORMATS. Оригинал не увеличивается.
+IMAGE_WIDTHS = (320, 640, 960, 1280)
+# Формат копии: (формат Pillow, параметры сохранения, расширение, MIME):
+IMAGE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}, 'webp', 'image/webp'),
+    'jpeg': ('JPEG', {'quality': THUMBNAIL_QUALITY, 'optimize': True,
+                      'progressive': True}, 'jpg', 'image/jpeg'),
+}
+# Копия для src у браузеров без srcset — ширина карточки поста (40rem):
+CARD_IMAGE_WIDTH = 640
+
+# Докачиваемые загрузки (blog/services/resumable.py): наибольший размер
+# одной части и сколько секунд хранить незавершённую загрузку:
+RESUMABLE_CHUNK_MAX_BYTES = 8 * 1024 * 1024
+RESUMABLE_UPLOAD_TTL = 24 * 60 * 60
+
+# Сколько секунд файл изображения без постов хранится до удаления командой
+# `purge_media` (blog/services/thumbnails.py). Должно быть больше времени
+# между сохранением файла и фиксацией поста с ним:
+MEDIA_PURGE_GRACE = 60 * 60
+
+# Сколько секунд браузер хранит статику с хешем содержимого в имени
+# (blog/staticfiles.py):
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# То же для общедоступных изображений постов (blog/media.py). Они тоже
+# неизменны, но доступ к ним отзывается снятием поста с публикации,
+# а закешированную копию отозвать нельзя — срок короткий:
+MEDIA_MAX_AGE = 60 * 60
+
+# Статика, для которой collectstatic кладёт сжатые копии .gz и .br
+# (blog/staticfiles.py); изображения и шрифты woff2 уже сжаты:
+STATIC_COMPRESS_EXTENSIONS = (
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.xml',
+    '.html', '.ico', '.ttf', '.otf', '.eot',
+)
+
 # Максимальный размер превью комментария в админке:
 ADMIN_COMMENT_PREVIEV_LENGTH = 120
 
@@ -0,0 +1,178 @@
+"""Обработчики сигналов моделей блога."""
+from django.core.cache import cache
+from django.db import IntegrityError, router, transaction
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from .models import Category, Comment, CommentThread, Location, Post, User
+from .services.page_cache import invalidate_feed_pages
+from .services.post_utils import (NEXT_PUBLICATION_CACHE_KEY, posts_published,
+                                  sync_post_visibility, touch_posts,
+                                  touch_threads)
+from .services.search import index_post, unindex_post
+from .services.thumbnails import generate_thumbnails
+
+
+def change_comment_count(post_id, delta):
+    """Атомарно изменяет счётчик комментариев поста на `delta`.
+
+    Счётчик хранится в ветке комментариев (`CommentThread`) в базе
+    комментариев, поэтому запись комментария не пишет в основную базу.
+    """
+    threads = CommentThread.objects.filter(pk=post_id)
+    if threads.update(count=F('count') + delta, updated_at=now()):
+        return
+    try:
+        # Первый комментарий поста; параллельная вставка той же ветки
+        # проиграет по первичному ключу и повторит обновление.
+        with transaction.atomic(using=router.db_for_write(CommentThread)):
+            CommentThread.objects.create(post_id=post_id, count=max(delta, 0))
+    except IntegrityError:
+        threads.update(count=F('count') + delta, updated_at=now())
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(sender, instance, **kwargs):
+    # В админке комментарий можно перенести к другому посту:
+    instance._previous_post_id = None
+    if instance.pk is not None:
+        instance._previous_post_id = (
+            Comment.objects.filter(pk=instance.pk)
+            .values_list('post_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if created or previous_post_id is None:
+        change_comment_count(instance.post_id, 1)
+    elif previous_post_id != instance.post_id:
+        change_comment_count(previous_post_id, -1)
+        change_comment_count(instance.post_id, 1)
+    else:
+        # Правка текста меняет страницу поста — обновляем версию ветки.
+        touch_threads(CommentThread.objects.filter(pk=instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    # Срабатывает и при удалении вслед за постом или автором,
+    # и при массовом удалении из админки.
+    change_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+def reset_next_publication(sender, using=None, **kwargs):
+    # Сразу — для чтений в той же транзакции, и после фиксации: иначе
+    # параллельный запрос успел бы закешировать дату по старым строкам.
+    cache.delete(NEXT_PUBLICATION_CACHE_KEY)
+    transaction.on_commit(
+        lambda: cache.delete(NEXT_PUBLICATION_CACHE_KEY), using=using
+    )
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'title', 'text'} & set(
+            update_fields):
+        return
+    index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_post(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_image(sender, instance, **kwargs):
+    instance._previous_image = None
+    if instance.pk is not None:
+        instance._previous_image = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('image', 'image_variants').first()
+        )
+
+
+# Файлы прежнего изображения не удаляются: они могут быть общими с другими
+# постами, ненужные удаляет команда `purge_media`.
+@receiver(post_save, sender=Post)
+def update_thumbnails(sender, instance, created, raw=False, using=None,
+                      **kwargs):
+    previous = getattr(instance, '_previous_image', None)
+    previous_name, previous_variants = previous or ('', {})
+    if raw or (not created and previous_name == instance.image.name):
+        return
+    if previous_variants:
+        Post.objects.filter(pk=instance.pk).update(image_variants={})
+        instance.image_variants = {}
+    # После фиксации: обработка изображения не должна держать блокировку
+    # записи (и пакет координатора записи).
+    transaction.on_commit(lambda: generate_thumbnails(instance), using=using)
+
+
+@receiver(post_save, sender=Category)
+def sync_category_visibility(sender, instance, **kwargs):
+    # В том числе при снятии с публикации через list_editable в админке.
+    sync_post_visibility(instance.posts.all())
+    touch_posts(instance.posts.all())
+
+
+@receiver(pre_delete, sender=Category)
+def hide_category_posts(sender, instance, **kwargs):
+    # Посты останутся без категории (SET_NULL) — в лентах их быть не должно.
+    instance.posts.update(is_visible=False, updated_at=now())
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def touch_location_posts(sender, instance, **kwargs):
+    touch_posts(instance.posts.all())
+
+
+@receiver(post_save, sender=User)
+def refresh_author_posts(sender, instance, update_fields=None, using=None,
+                         **kwargs):
+    # Вход на сайт сохраняет только last_login — карточки от него не зависят.
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    touch_posts(Post.objects.filter(author=instance))
+    # Комментарии и их ветки могут быть в другой базе — без JOIN.
+    touch_threads(CommentThread.objects.filter(pk__in=(
+        Comment.objects.filter(author=instance).values('post_id')
+    )))
+    invalidate_feed_pages(using)
+
+
+# Комментарии могут храниться в другой базе, где каскад на уровне ORM
+# невозможен, поэтому они удаляются вслед за постом и автором здесь.
+@receiver(post_delete, sender=Post)
+def delete_post_comments(sender, instance, **kwargs):
+    Comment.objects.filter(post_id=instance.pk).delete()
+    CommentThread.objects.filter(pk=instance.pk).delete()
+
+
+@receiver(post_delete, sender=User)
+def delete_author_comments(sender, instance, **kwargs):
+    Comment.objects.filter(author_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(posts_published)
+def reset_feed_pages(sender, using=None, **kwargs):
+    # Любое изменение контента лент делает устаревшими закешированные
+    # страницы (blog/services/page_cache.py).
+    invalidate_feed_pages(using)
@@ -0,0 +1,37 @@
+"""Настройка соединений с SQLite.
+
+Прагмы из `settings.SQLITE_PRAGMAS` применяются к каждому новому
+соединению (сигнал `connection_created`). В производственном профиле
+(см. blogicum/settings.py) это WAL-журнал и ожидание блокировки вместо
+немедленной ошибки «database is locked»: читатели не ждут писателей,
+а писатели ждут друг друга не дольше `busy_timeout`.
+"""
+import sqlite3
+
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Выполняет прагмы из настроек на новом соединении с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def copy_database(connection, target):
+    """Копирует базу соединения `connection` в файл `target`.
+
+    Используется онлайн-бэкап SQLite: копия согласована, а основная база
+    во время копирования остаётся доступной.
+    """
+    connection.ensure_connection()
+    destination = sqlite3.connect(target)
+    try:
+        connection.connection.backup(destination)
+    finally:
+        destination.close()
@@ -0,0 +1,151 @@
+"""Статика: имена с хешем содержимого и заранее сжатые копии.
+
+В профиле production `collectstatic` собирает статику хранилищем
+`CompressedManifestStaticFilesStorage`: файлы получают имена с хешем
+содержимого (`css/bootstrap.3f2b9c0d1e4a.css`) и манифест, по которому
+их подставляет тег `{% static %}`, а рядом с каждым сжимаемым файлом
+кладутся копии `.gz` и `.br` (brotli — если установлен пакет `brotli`).
+Уже собранную статику сжимает команда `manage.py compress_static`.
+
+`serve` отдаёт файлы из STATIC_ROOT, когда их не раздаёт фронт-сервер:
+выбирает сжатую копию по Accept-Encoding, а файлы с хешем в имени
+разрешает кешировать на год.
+"""
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings as django_settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
+from django.urls import re_path
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from . import settings
+from .media import file_response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+# Сжатые копии, которые умеет отдавать `serve`, по предпочтению:
+COMPRESSED_EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+
+def compress_gzip(data):
+    # mtime=0: одинаковый файл даёт одинаковую копию при каждой сборке.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def get_encodings():
+    """{кодировка: (расширение копии, функция сжатия)} по предпочтению."""
+    encodings = {}
+    if brotli is not None:
+        encodings['br'] = ('.br', brotli.compress)
+    encodings['gzip'] = ('.gz', compress_gzip)
+    return encodings
+
+
+def is_compressible(path):
+    return (os.path.splitext(path)[1].lower()
+            in settings.STATIC_COMPRESS_EXTENSIONS)
+
+
+def compress_file(path):
+    """Кладёт рядом с файлом его сжатые копии; возвращает их число.
+
+    Копия не нужна, если она не меньше оригинала: такую удаляем.
+    """
+    with open(path, 'rb') as source:
+        data = source.read()
+    written = 0
+    for extension, compress in get_encodings().values():
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            with open(path + extension, 'wb') as target:
+                target.write(compressed)
+            written += 1
+        elif os.path.exists(path + extension):
+            os.remove(path + extension)
+    return written
+
+
+def compress_directory(root):
+    """Сжимает все подходящие файлы каталога; возвращает число копий."""
+    written = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if is_compressible(filename):
+                written += compress_file(os.path.join(directory, filename))
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест с хешами имён и сжатые копии файлов с хешем."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in set(self.hashed_files.values()):
+            if is_compressible(hashed_name):
+                compress_file(self.path(hashed_name))
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, которые клиент не запретил (q=0)."""
+    accepted = set()
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = item.partition(';')
+        name, _, value = params.strip().partition('=')
+        try:
+            quality = float(value) if name == 'q' else 1
+        except ValueError:
+            quality = 1
+        if coding.strip() and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def serve(request, path):
+    try:
+        full_path = safe_join(django_settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Файл не найден.')
+    if not os.path.isfile(full_path):
+        raise Http404('Файл не найден.')
+
+    accepted = accepted_encodings(request)
+    chosen_path, chosen_encoding, variants = full_path, None, False
+    for encoding, extension in COMPRESSED_EXTENSIONS.items():
+        if not os.path.isfile(full_path + extension):
+            continue
+        variants = True
+        if chosen_encoding is None and (encoding in accepted
+                                        or '*' in accepted):
+            chosen_path, chosen_encoding = full_path + extension, encoding
+
+    response = file_response(request, chosen_path,
+                             content_type=mimetypes.guess_type(full_path)[0])
+    if chosen_encoding is not None:
+        response['Content-Encoding'] = chosen_encoding
+    if variants:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    if HASHED_NAME.search(path):
+        patch_cache_control(response, public=True,
+                            max_age=settings.IMMUTABLE_MAX_AGE,
+                            immutable=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def static_urlpatterns():
+    """Маршрут раздачи STATIC_URL из STATIC_ROOT."""
+    prefix = re.escape(django_settings.STATIC_URL.lstrip('/'))
+    return [re_path(rf'^{prefix}(?P<path>.+)$', serve, name='static')]
@@ -0,0 +1,111 @@
+"""Хранилище загруженных файлов с адресацией по содержимому.
+
+Файл сохраняется под именем из SHA-256 его содержимого:
+`posts_images/3f/3f2b…9c.jpg`. Одинаковые загрузки хранятся один раз, а
+файл под таким именем никогда не меняется, поэтому его можно кешировать
+надолго (см. blog/media.py).
+
+Один файл может принадлежать нескольким постам, поэтому удаление поста
+его не трогает: файлы, на которые не ссылается ни один пост, удаляет
+команда `manage.py purge_media`, и только если они не менялись дольше
+`MEDIA_PURGE_GRACE`. Повторное сохранение существующего файла обновляет
+его mtime; проверка и удаление, с одной стороны, и сохранение,
+с другой, идут под общей блокировкой (`lock`), так что только что
+сохранённый файл не удаляется.
+"""
+import hashlib
+import os
+import posixpath
+import re
+from contextlib import contextmanager
+
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: сохранение и удаление одного файла не защищены от гонки.
+    fcntl = None
+
+HASH_CHUNK_SIZE = 64 * 2 ** 10
+# Каталог файлов блокировок внутри хранилища; файлы делят 256 блокировок.
+LOCKS_DIR = '.locks'
+CONTENT_ADDRESSED_NAME = re.compile(
+    r'(?:^|/)(?P<prefix>[0-9a-f]{2})/(?P=prefix)[0-9a-f]{62}\.\w+$'
+)
+
+
+def is_content_addressed(name):
+    """Имя дано по содержимому, то есть содержимое под ним неизменно."""
+    return CONTENT_ADDRESSED_NAME.search(name) is not None
+
+
+def get_digest(content):
+    digest = hashlib.sha256()
+    if hasattr(content, 'temporary_file_path'):
+        with open(content.temporary_file_path(), 'rb') as data:
+            while chunk := data.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+    else:
+        for chunk in content.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+        content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит файлы под именами из хеша содержимого, без дубликатов."""
+
+    @contextmanager
+    def lock(self, name):
+        """Блокировка файла `name` (и его копий) между процессами."""
+        if fcntl is None:
+            yield
+            return
+        stem = posixpath.splitext(posixpath.basename(name))[0]
+        directory = os.path.join(self.location, LOCKS_DIR)
+        os.makedirs(directory, exist_ok=True)
+        stripe = hashlib.md5(stem.encode()).hexdigest()[:2]
+        with open(os.path.join(directory, stripe), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def retain(self, name):
+        """Обновляет mtime файла, чтобы `purge` его не удалил.
+
+        Возвращает False, если файла уже нет.
+        """
+        with self.lock(name):
+            try:
+                os.utime(self.path(name))
+            except FileNotFoundError:
+                return False
+            return True
+
+    def purge(self, name, deadline):
+        """Удаляет файл, если он не менялся с момента `deadline`."""
+        with self.lock(name):
+            try:
+                if os.path.getmtime(self.path(name)) >= deadline:
+                    return False
+                os.remove(self.path(name))
+            except FileNotFoundError:
+                return False
+            return True
+
+    def _save(self, name, content):
+        directory, filename = posixpath.split(name)
+        digest = get_digest(content)
+        name = posixpath.join(
+            directory, digest[:2],
+            digest + posixpath.splitext(filename)[1].lower(),
+        )
+        with self.lock(name):
+            # Такой файл уже есть — второй раз не записываем. Перемещённый
+            # файл (докачанная загрузка) сохраняет старый mtime. В обоих
+            # случаях mtime обновляется, чтобы `purge` не удалил файл
+            # до того, как на него сошлётся пост.
+            if not self.exists(name):
+                name = super()._save(name, content)
+            os.utime(self.path(name))
+        return name
@@ -0,0 +1,55 @@
+"""Потоковая загрузка файлов с ограничением размера.
+
+По умолчанию Django держит загружаемые файлы до 2,5 МБ в памяти, а
+Pillow при проверке `ImageField` открывает файл целиком. `BoundedUploadHandler`
+(см. `FILE_UPLOAD_HANDLERS` в blogicum/settings.py) пишет каждый файл
+на диск порциями по `chunk_size` байт и перестаёт его принимать, как
+только он превысит `UPLOAD_MAX_BYTES`: вместо файла форма получает
+`RejectedUpload` и сообщает об ошибке (см. `BoundedImageField`
+в blog/forms.py). Так память на загрузку не зависит от размера файла.
+"""
+from io import BytesIO
+
+from django.conf import settings as django_settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+def get_upload_max_bytes():
+    """Наибольший размер загружаемого файла; None — без ограничения."""
+    return getattr(django_settings, 'UPLOAD_MAX_BYTES', None)
+
+
+class RejectedUpload(UploadedFile):
+    """Файл, который не был принят целиком: он больше `limit` байт."""
+
+    def __init__(self, name, content_type, size, charset, limit):
+        super().__init__(BytesIO(), name, content_type, size, charset)
+        self.limit = limit
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загружаемые файлы на диск, пока они не превысят лимит."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.limit = get_upload_max_bytes()
+        self.received = 0
+        self.rejected = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.rejected:
+            return None
+        self.received += len(raw_data)
+        if self.limit is not None and self.received > self.limit:
+            # Остаток файла парсер запроса прочитает и отбросит.
+            self.rejected = True
+            self.upload_interrupted()
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.rejected:
+            return RejectedUpload(self.file_name, self.content_type,
+                                  file_size, self.charset, self.limit)
+        return super().file_complete(file_size)
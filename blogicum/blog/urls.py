@@ -1,17 +1,23 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
+from .async_views import as_async_view
 
 app_name = 'blog'
 
+# Представления только для чтения под ASGI — асинхронные.
+read_view = (as_async_view if settings.ASYNC_READ_VIEWS
+             else lambda view_class: view_class.as_view())
+
 urlpatterns = [
     # Главная страница:
     path('',
-         views.IndexView.as_view(),
+         read_view(views.IndexView),
          name='index'),
     # Посты:
     path('posts/<int:post_id>/',
-         views.PostDetailView.as_view(),
+         read_view(views.PostDetailView),
          name='post_detail'),
     path('posts/create/',
          views.PostCreateView.as_view(),
@@ -22,18 +28,32 @@ urlpatterns = [
     path('posts/<int:post_id>/delete/',
          views.PostDeleteView.as_view(),
          name='delete_post'),
+    # Докачиваемые загрузки изображений постов:
+    path('uploads/',
+         views.UploadCreateView.as_view(),
+         name='upload_create'),
+    path('uploads/<str:token>/',
+         views.UploadView.as_view(),
+         name='upload'),
     # Категории:
     path('category/<slug:category_slug>/',
-         views.CategoryView.as_view(),
+         read_view(views.CategoryView),
          name='category_posts'),
+    # Поиск:
+    path('search/',
+         views.SearchView.as_view(),
+         name='search'),
     # Профили пользователей:
     path('profile/edit/',
          views.ProfileUpdateView.as_view(),
          name='edit_profile'),
     path('profile/<str:username>/',
-         views.ProfileView.as_view(),
+         read_view(views.ProfileView),
          name='profile'),
     # Комментарии:
+    path('posts/<int:post_id>/comments/',
+         views.CommentListView.as_view(),
+         name='comments'),
     path('<int:post_id>/comment/',
          views.CommentCreateView.as_view(),
          name='add_comment'),
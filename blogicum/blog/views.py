@@ -1,29 +1,42 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
-                                  UpdateView)
+                                  UpdateView, View)
 
 from . import settings
 from .forms import CommentForm, PostForm
-from .mixins import CommentMixin, OnlyAuthorMixin, PostMixin
-from .models import Category, Post, User
-from .services.post_utils import annotate_comment_count
-from .services.post_utils import filter_published_posts
+from .mixins import (AnonymousPageCacheMixin, CommentMixin,
+                     ConditionalGetMixin, FeedConditionalGetMixin,
+                     IdentityMapMixin, OnlyAuthorMixin, PostFeedMixin,
+                     PostMixin, ReplicaReadMixin, ResumableUploadMixin,
+                     WriteCoordinatorMixin)
+from .models import Category, CommentThread, Post, User
+from .services.pagination import CursorPaginator
+from .services.post_utils import (COMMENT_ORDERING, filter_published_posts,
+                                  hydrate_posts, select_post_related)
+from .services.resumable import (UploadError, create_upload, get_upload,
+                                 parse_metadata)
+from .services.search import SEARCH_ORDERING, search_posts
 
 
 # Отображение контента:
-class IndexView(ListView):
+class IndexView(FeedConditionalGetMixin, AnonymousPageCacheMixin,
+                ReplicaReadMixin, PostFeedMixin, ListView):
     """Вывод последних опубликованных постов. Видно всем."""
 
     model = Post
     template_name = 'blog/index.html'
     context_object_name = 'posts'
-    paginate_by = settings.POSTS_PER_PAGE
-    queryset = filter_published_posts(annotate_comment_count())
+
+    def get_queryset(self):
+        return filter_published_posts()
 
 
-class PostDetailView(LoginRequiredMixin, DetailView):
+class PostDetailView(LoginRequiredMixin, ConditionalGetMixin,
+                     ReplicaReadMixin, IdentityMapMixin, DetailView):
     """Вывод отдельного поста.
 
     Выводит страницу поста с комментариями и формой для комментирования.
@@ -35,33 +48,77 @@ class PostDetailView(LoginRequiredMixin, DetailView):
     pk_url_kwarg = 'post_id'
     template_name = 'blog/detail.html'
 
-    def get_object(self, post_query=None):
-        post = get_object_or_404(Post, pk=self.kwargs[self.pk_url_kwarg])
-        if post.author == self.request.user:
-            return post
-        return get_object_or_404(filter_published_posts(),
-                                 pk=self.kwargs[self.pk_url_kwarg])
+    def get_last_modified(self):
+        # Страница меняется вместе с постом и с веткой его комментариев
+        # (она в базе комментариев). Доступ проверяется до условного
+        # ответа: иначе посторонний получил бы 304 вместо 404 на скрытый
+        # пост.
+        post_id = self.kwargs[self.pk_url_kwarg]
+        post = Post.objects.filter(pk=post_id).values(
+            'updated_at', 'is_visible', 'author_id'
+        ).first()
+        if post is None:
+            raise Http404('Пост не найден')
+        self.check_visibility(post['is_visible'], post['author_id'])
+        thread_updated_at = CommentThread.objects.filter(
+            pk=post_id
+        ).values_list('updated_at', flat=True).first()
+        return max(filter(None, (post['updated_at'], thread_updated_at)))
+
+    def check_visibility(self, is_visible, author_id):
+        if author_id != self.request.user.pk and not is_visible:
+            raise Http404('Пост не опубликован')
+
+    def get_queryset(self):
+        return select_post_related(Post.objects.all())
+
+    def get_object(self, queryset=None):
+        # Один запрос: видимость проверяется по загруженному посту.
+        # Отложенные посты к этому моменту уже опубликованы в dispatch().
+        post = super().get_object(queryset)
+        self.check_visibility(post.is_visible, post.author_id)
+        return post
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = self.object.comments.select_related('author')
+        context['comments'] = self.get_comments_page()
         return context
 
+    def get_comments_page(self):
+        """Порция комментариев, начиная с курсора из запроса."""
+        paginator = CursorPaginator(
+            # Комментарии могут быть в другой базе: авторы подгружаются
+            # отдельным запросом, а не JOIN.
+            self.object.comments.prefetch_related('author'),
+            settings.COMMENTS_PER_PAGE,
+            COMMENT_ORDERING,
+        )
+        try:
+            return paginator.page(self.request.GET.get('cursor'))
+        except InvalidPage as error:
+            raise Http404(f'Неверная страница: {error}')
+
+
+class CommentListView(PostDetailView):
+    """Следующая порция комментариев к посту для кнопки «Показать ещё»."""
 
-class CategoryView(ListView):
+    template_name = 'includes/comment_list.html'
+
+
+class CategoryView(AnonymousPageCacheMixin, ReplicaReadMixin,
+                   IdentityMapMixin, PostFeedMixin, ListView):
     """Отображение постов в категории. Видно всем."""
 
     model = Category
     template_name = 'blog/index.html'
-    paginate_by = settings.POSTS_PER_PAGE
 
     def get_category(self):
-        return get_object_or_404(
+        return self.remember('category', lambda: get_object_or_404(
             Category,
             is_published=True,
             slug=self.kwargs['category_slug']
-        )
+        ))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -69,21 +126,52 @@ class CategoryView(ListView):
         return context
 
     def get_queryset(self):
-        return filter_published_posts(
-            annotate_comment_count(self.get_category().posts)
-        )
+        return filter_published_posts(self.get_category().posts)
+
+
+class SearchView(ReplicaReadMixin, ListView):
+    """Полнотекстовый поиск по опубликованным постам. Видно всем.
+
+    Результаты отсортированы по релевантности и разбиты на страницы
+    курсором (без OFFSET).
+    """
+
+    template_name = 'blog/search.html'
+    paginate_by = settings.POSTS_PER_PAGE
 
+    def get_search_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_queryset(self):
+        return search_posts(self.get_search_query())
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(queryset, page_size, SEARCH_ORDERING,
+                                    hydrate=hydrate_posts)
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidPage as error:
+            raise Http404(f'Неверная страница: {error}')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['search_query'] = self.get_search_query()
+        return context
+
+
+class PostCreateView(LoginRequiredMixin, WriteCoordinatorMixin, CreateView):
     """Создание нового поста. Только для залогиненных пользователей."""
 
     model = Post
     form_class = PostForm
     template_name = 'blog/create.html'
 
-    def form_valid(self, form):
-        form.instance.author = self.request.user
-        return super().form_valid(form)
+    def get_form_kwargs(self):
+        # Автор известен форме заранее: по нему проверяется владелец
+        # докачиваемой загрузки.
+        return {**super().get_form_kwargs(),
+                'instance': Post(author=self.request.user)}
 
     def get_success_url(self):
         return reverse(
@@ -104,7 +192,9 @@ class PostDeleteView(PostMixin, DeleteView):
 
 
 # Работа с профилем пользователя:
-class ProfileView(ListView):
+class ProfileView(FeedConditionalGetMixin, AnonymousPageCacheMixin,
+                  ReplicaReadMixin, IdentityMapMixin, PostFeedMixin,
+                  ListView):
     """Отображение профиля пользователя.
 
     Владелец видит в своём профиле все посты. Другиие пользователи видят
@@ -113,10 +203,15 @@ class ProfileView(ListView):
 
     model = User
     template_name = 'blog/profile.html'
-    paginate_by = settings.POSTS_PER_PAGE
 
     def get_author(self):
-        return get_object_or_404(User, username=self.kwargs['username'])
+        username = self.kwargs['username']
+        if self.request.user.get_username() == username:
+            # Свой профиль: пользователь уже загружен для запроса.
+            return self.request.user
+        return self.remember('author', lambda: get_object_or_404(
+            User, username=username
+        ))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -125,13 +220,14 @@ class ProfileView(ListView):
 
     def get_queryset(self):
         author = self.get_author()
-        posts = annotate_comment_count(author.posts)
-        if self.request.user != author:
+        posts = author.posts.all()
+        if self.request.user.pk != author.pk:
             posts = filter_published_posts(posts)
         return posts
 
 
-class ProfileUpdateView(LoginRequiredMixin, UpdateView):
+class ProfileUpdateView(LoginRequiredMixin, WriteCoordinatorMixin,
+                        UpdateView):
     """Редактирование профиля пользователя."""
 
     model = User
@@ -163,3 +259,55 @@ class CommentUpdateView(CommentMixin, OnlyAuthorMixin, UpdateView):
 
 class CommentDeleteView(CommentMixin, OnlyAuthorMixin, DeleteView):
     """Удаление комментария. Только для автора."""
+
+
+# Докачиваемые загрузки изображений (протокол tus):
+class UploadCreateView(ResumableUploadMixin, View):
+    """Создание загрузки заданного размера."""
+
+    def post(self, request):
+        try:
+            length = int(request.headers['Upload-Length'])
+        except (KeyError, ValueError):
+            raise UploadError('Не указан размер загрузки.', 400)
+        metadata = parse_metadata(request.headers.get('Upload-Metadata', ''))
+        upload = create_upload(request.user, length,
+                               metadata.get('filename', ''))
+        response = HttpResponse(status=201)
+        response['Location'] = reverse('blog:upload', args=(upload.token,))
+        return response
+
+
+class UploadView(ResumableUploadMixin, View):
+    """Смещение загрузки (HEAD), её продолжение (PATCH) и отмена."""
+
+    def get_upload(self):
+        upload = get_upload(self.kwargs['token'], self.request.user.pk)
+        if upload is None:
+            raise Http404('Загрузка не найдена.')
+        return upload
+
+    def head(self, request, token):
+        upload = self.get_upload()
+        response = HttpResponse()
+        response['Upload-Offset'] = upload.offset
+        response['Upload-Length'] = upload.length
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def patch(self, request, token):
+        if request.content_type != 'application/offset+octet-stream':
+            raise UploadError('Неверный Content-Type части загрузки.', 415)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            raise UploadError('Не указано смещение части загрузки.', 400)
+        upload = self.get_upload()
+        size = int(request.META.get('CONTENT_LENGTH') or 0)
+        response = HttpResponse(status=204)
+        response['Upload-Offset'] = upload.append(offset, request, size)
+        return response
+
+    def delete(self, request, token):
+        self.get_upload().delete()
+        return HttpResponse(status=204)
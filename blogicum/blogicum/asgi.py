@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+# Включает асинхронные представления лент и постов (ASYNC_READ_VIEWS).
+os.environ.setdefault('BLOGICUM_SERVER', 'asgi')
 
 application = get_asgi_application()
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,6 +35,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.middleware.PrimaryPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -67,6 +69,106 @@ DATABASES = {
     }
 }
 
+# База для комментариев (blog/routers.py). BLOGICUM_COMMENTS_DB=1 выносит
+# их в соседний файл, чтобы частые записи комментариев не блокировали
+# запись постов и пользователей; после этого нужен
+# `python manage.py migrate --database comments`.
+COMMENTS_DATABASE = 'default'
+if os.environ.get('BLOGICUM_COMMENTS_DB'):
+    DATABASES['comments'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.comments.sqlite3',
+    }
+    COMMENTS_DATABASE = 'comments'
+
+# Реплики для чтения (blog/routers.py). Для локальной проверки
+# BLOGICUM_REPLICAS=N заводит N копий базы в соседних файлах; их обновляет
+# команда `python manage.py sync_replicas --watch`.
+DATABASE_REPLICAS = []
+for number in range(1, int(os.environ.get('BLOGICUM_REPLICAS', 0)) + 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db.{alias}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = [
+    'blog.routers.CommentRouter',
+    'blog.routers.ReplicaRouter',
+]
+
+# Асинхронные представления лент и постов (blog/async_views.py). Нужны
+# только под ASGI — blogicum/asgi.py включает их сам.
+ASYNC_READ_VIEWS = os.environ.get('BLOGICUM_SERVER') == 'asgi'
+
+# Процессов для уменьшения изображений постов (blog/services/thumbnails.py);
+# 0 — уменьшать сразу после сохранения поста, задерживая ответ.
+IMAGE_WORKERS = 2
+
+# Загружаемые файлы пишутся на диск порциями (blog/uploads.py); файл
+# больше UPLOAD_MAX_BYTES не принимается. Изображение больше
+# IMAGE_MAX_PIXELS отклоняется по заголовку, до декодирования.
+FILE_UPLOAD_HANDLERS = ['blog.uploads.BoundedUploadHandler']
+UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_MAX_PIXELS = 40 * 10 ** 6
+# Каталог докачиваемых загрузок (blog/services/resumable.py). Должен
+# быть на одном диске с MEDIA_ROOT: готовый файл туда перемещается.
+RESUMABLE_UPLOAD_DIR = BASE_DIR / 'uploads'
+
+# Профиль базы данных: 'development' или 'production' — несколько
+# воркеров gunicorn на одном файле SQLite.
+DB_PROFILE = os.environ.get('BLOGICUM_DB_PROFILE', 'development')
+
+# Прагмы для каждого нового соединения с SQLite (blog/sqlite.py):
+SQLITE_PRAGMAS = {}
+
+# Запись в базу через единственный поток-писатель процесса
+# (blog/services/writer.py). Только вместе с журналом WAL: админка ждёт
+# писателя изнутри своей читающей транзакции.
+WRITE_COORDINATOR = False
+
+if DB_PROFILE == 'production':
+    for database in DATABASES.values():
+        database.update(
+            # Постоянные соединения: прагмы и кеш страниц SQLite переживают
+            # запрос, соединение не открывается заново.
+            CONN_MAX_AGE=600,
+            # Ожидание блокировки модулем sqlite3, в секундах.
+            OPTIONS={'timeout': 5},
+        )
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    }
+    WRITE_COORDINATOR = True
+    # Общий для воркеров кеш: версия лент, кеш страниц и дата ближайшей
+    # публикации (blog/services/page_cache.py, post_utils.py) должны быть
+    # одни на все процессы, а `LocMemCache` у каждого свой. Файловому
+    # кешу не нужен сервер; BLOGICUM_MEMCACHED=host:port заменяет его
+    # на memcached (нужен пакет pymemcache).
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'cache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
+    if os.environ.get('BLOGICUM_MEMCACHED'):
+        CACHES['default'] = {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.environ['BLOGICUM_MEMCACHED'],
+        }
+    # Имена статики с хешем содержимого и сжатые копии (blog/staticfiles.py):
+    STATICFILES_STORAGE = (
+        'blog.staticfiles.CompressedManifestStaticFilesStorage'
+    )
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -93,6 +195,9 @@ USE_L10N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
+# Сюда собирает статику collectstatic; отсюда её отдаёт blog/staticfiles.py,
+# если не фронт-сервер.
+STATIC_ROOT = BASE_DIR / 'collected_static'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -108,5 +213,13 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'blog:index'
 
 MEDIA_ROOT = BASE_DIR / 'media'
+# Файлы хранятся под хешем содержимого, без дубликатов (blog/storage.py):
+DEFAULT_FILE_STORAGE = 'blog.storage.ContentAddressedStorage'
+# Раздача загруженных файлов (blog/media.py): 'python' — самим Django,
+# 'x-accel-redirect' (nginx) или 'x-sendfile' — фронт-сервером после
+# проверки доступа в Django, пустая строка — фронт-сервером без проверок.
+MEDIA_SERVING = os.environ.get('BLOGICUM_MEDIA_SERVING', 'python')
+# Internal-location nginx для X-Accel-Redirect, смотрящий в MEDIA_ROOT:
+MEDIA_ACCEL_PREFIX = '/protected-media/'
 
 CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
@@ -1,8 +1,7 @@
-from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from blog import media, staticfiles
 from pages.views import RegistrationView
 
 
@@ -21,4 +20,4 @@ urlpatterns = [
          include('pages.urls')),
     path('',
          include('blog.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+] + staticfiles.static_urlpatterns() + media.media_urlpatterns()
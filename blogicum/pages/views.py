@@ -4,14 +4,16 @@ from django.urls import reverse_lazy
 from django.views.generic import TemplateView
 from django.views.generic.edit import CreateView
 
+from blog.mixins import ReplicaReadMixin
 
-class AboutPage(TemplateView):
+
+class AboutPage(ReplicaReadMixin, TemplateView):
     """Страница информации о проекте."""
 
     template_name = 'pages/about.html'
 
 
-class RulesPage(TemplateView):
+class RulesPage(ReplicaReadMixin, TemplateView):
     """Страница правил сайта."""
 
     template_name = 'pages/rules.html'
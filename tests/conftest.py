@@ -3,6 +3,7 @@ import re
 import time
 from http import HTTPStatus
 from inspect import getsource
+from io import BytesIO
 from pathlib import Path
 from typing import (Any, Iterable, List, NamedTuple, Optional, Tuple, Type,
                     TypeVar, Union)
@@ -10,12 +11,15 @@ from typing import (Any, Iterable, List, NamedTuple, Optional, Tuple, Type,
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.db.models import Field, Model
 from django.forms import BaseForm
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
 from mixer.backend.django import mixer as _mixer
+from PIL import Image
 
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
@@ -32,6 +36,21 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def render_images_inline(settings):
+    # Копии изображений создаются сразу, а не в пуле процессов:
+    # тесты проверяют их сразу после сохранения поста.
+    settings.IMAGE_WORKERS = 0
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Кеш страниц, карточек и версий не должен переходить из теста в тест.
+    cache.clear()
+    yield
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -124,6 +143,40 @@ def another_user_client(another_user):
     return client
 
 
+def make_image_bytes(
+        size: Tuple[int, int] = (400, 300), image_format: str = "JPEG",
+        exif: Optional[dict] = None,
+) -> bytes:
+    buffer = BytesIO()
+    options = {}
+    if exif:
+        options["exif"] = Image.Exif()
+        options["exif"].update(exif)
+    Image.new("RGB", size, color=(73, 109, 137)).save(
+        buffer, format=image_format, **options
+    )
+    return buffer.getvalue()
+
+
+def make_image(
+        size: Tuple[int, int] = (400, 300), image_format: str = "JPEG",
+        exif: Optional[dict] = None,
+) -> SimpleUploadedFile:
+    extension = "jpg" if image_format == "JPEG" else image_format.lower()
+    return SimpleUploadedFile(
+        f"photo.{extension}", make_image_bytes(size, image_format, exif),
+        content_type=f"image/{image_format.lower()}",
+    )
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    # Файлы, копии и блокировки хранилища (blog/storage.py) — во временном
+    # каталоге теста, а не в MEDIA_ROOT проекта.
+    settings.MEDIA_ROOT = tmp_path / "media"
+    return settings.MEDIA_ROOT
+
+
 def get_post_list_context_key(
         user_client, page_url, page_load_err_msg, key_missing_msg
 ):
@@ -354,6 +407,7 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
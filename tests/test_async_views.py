@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_read_views_run_in_db_pool(
+        post_with_published_location, user, monkeypatch
+):
+    from blog import views
+    from blog.async_views import as_async_view
+
+    post = post_with_published_location
+    threads = []
+    get_queryset = views.IndexView.get_queryset
+
+    def spy(view):
+        threads.append(threading.current_thread().name)
+        return get_queryset(view)
+
+    monkeypatch.setattr(views.IndexView, "get_queryset", spy)
+    factory = RequestFactory()
+    for viewer in (AnonymousUser(), user):
+        request = factory.get("/")
+        request.user = viewer
+        response = async_to_sync(as_async_view(views.IndexView))(request)
+        assert response.status_code == 200
+        assert post.title in response.content.decode()
+    assert threads and all(name.startswith("blog-db") for name in threads), (
+        "Убедитесь, что асинхронные представления работают с базой"
+        " в пуле потоков."
+    )
+
+    request = factory.get(f"/posts/{post.id}/")
+    request.user = user
+    response = async_to_sync(as_async_view(views.PostDetailView))(
+        request, post_id=post.id
+    )
+    assert response.status_code == 200
+    assert post.title in response.content.decode()
@@ -0,0 +1,49 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def thread_count(post) -> int:
+    from blog.models import CommentThread
+
+    thread = CommentThread.objects.filter(post=post).first()
+    return thread.count if thread else 0
+
+
+def test_comment_count_follows_comments(
+        mixer: Mixer, post_with_published_location, another_user
+):
+    from blog.models import Comment, CommentThread
+
+    post = post_with_published_location
+    other_post = mixer.blend("blog.Post", author=post.author)
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    assert thread_count(post) == 3, (
+        "Убедитесь, что счётчик комментариев поста растёт при добавлении"
+        " комментария."
+    )
+
+    comments[0].delete()
+    moved = comments[1]
+    moved.post = other_post
+    moved.save()
+    assert (thread_count(post), thread_count(other_post)) == (1, 1), (
+        "Убедитесь, что счётчик учитывает удаление и перенос комментария."
+    )
+
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    another_user.delete()
+    assert thread_count(post) == Comment.objects.filter(post=post).count(), (
+        "Убедитесь, что счётчик учитывает каскадное удаление комментариев."
+    )
+
+    CommentThread.objects.update(count=42)
+    CommentThread.objects.filter(post=other_post).delete()
+    call_command("recount_comments", stdout=StringIO())
+    assert (thread_count(post), thread_count(other_post)) == (1, 1), (
+        "Убедитесь, что команда `recount_comments` исправляет счётчики."
+    )
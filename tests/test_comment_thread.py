@@ -0,0 +1,48 @@
+import re
+from html import unescape
+
+import pytest
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+MORE_LINK = re.compile(r'href="([^"]+)"[^>]*>\s*Показать ещё комментарии')
+COMMENT_ANCHOR = re.compile(r'name="comment_(\d+)"')
+
+
+def test_comment_thread_is_loaded_in_portions(
+        mixer: Mixer, post_with_published_location, user_client
+):
+    from blog import settings as blog_settings
+
+    post = post_with_published_location
+    comments = mixer.cycle(blog_settings.COMMENTS_PER_PAGE * 2 + 5).blend(
+        "blog.Comment", post=post
+    )
+    response = user_client.get(f"/posts/{post.id}/")
+    content = response.content.decode()
+    assert len(response.context["comments"]) == (
+        blog_settings.COMMENTS_PER_PAGE
+    ), (
+        "Убедитесь, что страница поста выводит только первую порцию"
+        " комментариев."
+    )
+
+    seen = [int(pk) for pk in COMMENT_ANCHOR.findall(content)]
+    portions = 1
+    while MORE_LINK.search(content):
+        url = unescape(MORE_LINK.search(content).group(1))
+        response = user_client.get(url)
+        assert response.status_code == 200
+        content = response.content.decode()
+        seen.extend(int(pk) for pk in COMMENT_ANCHOR.findall(content))
+        portions += 1
+    assert portions == 3
+    assert seen == [comment.id for comment in comments], (
+        "Убедитесь, что кнопка «Показать ещё» подгружает все комментарии"
+        " по одному разу и в порядке добавления."
+    )
+
+    assert user_client.get(
+        f"/posts/{post.id}/comments/?cursor=forged"
+    ).status_code == 404
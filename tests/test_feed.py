@@ -0,0 +1,206 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_posts(mixer: Mixer, user, published_category):
+    # Часть постов с одинаковой датой — проверка границы страниц по `id`.
+    base = timezone.now() - timedelta(days=1)
+    dates = (base - timedelta(minutes=i // 3) for i in range(25))
+    return mixer.cycle(25).blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        pub_date=dates,
+    )
+
+
+@pytest.fixture
+def cursor_pagination(monkeypatch):
+    from blog import settings as blog_settings
+    monkeypatch.setattr(blog_settings, "POSTS_PAGINATION", "cursor")
+
+
+def test_cursor_pagination_walks_whole_feed(
+        cursor_pagination, feed_posts, user_client
+):
+    expected = [
+        post.id for post in sorted(
+            feed_posts, key=lambda p: (p.pub_date, p.id), reverse=True)
+    ]
+    seen, url, pages = [], "/", []
+    while url:
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.get(url)
+        assert response.status_code == 200
+        assert not any(
+            "COUNT(*)" in query["sql"].upper() for query in queries
+        ), "Курсорная пагинация не должна выполнять COUNT."
+        page = response.context["page_obj"]
+        pages.append(page)
+        seen.extend(post.id for post in page)
+        url = f"/?cursor={page.next_cursor}" if page.has_next() else None
+    assert seen == expected, (
+        "Убедитесь, что курсорная пагинация выводит все посты ленты"
+        " по одному разу и в порядке убывания даты публикации."
+    )
+
+    last = pages[-1]
+    response = user_client.get(f"/?cursor={last.previous_cursor}")
+    assert [post.id for post in response.context["page_obj"]] == [
+        post.id for post in pages[-2]
+    ], "Ссылка «назад» должна вести на предыдущую страницу ленты."
+
+
+def test_cursor_pagination_rejects_forged_cursor(cursor_pagination, user_client):
+    assert user_client.get("/?cursor=forged").status_code == 404
+
+
+def test_feed_page_is_fetched_in_two_phases(feed_posts, user_client):
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get("/?page=2")
+    assert len(response.context["page_obj"]) == 10
+    post_queries = [
+        query["sql"] for query in queries
+        if '"blog_post"' in query["sql"] and "MIN(" not in query["sql"]
+    ]
+    count_sql, ids_sql, hydrate_sql = post_queries
+    assert "COUNT(*)" in count_sql and "JOIN" not in count_sql
+    assert "JOIN" not in ids_sql, (
+        "Выборка ленты не должна присоединять другие таблицы."
+    )
+    assert '"blog_post"."title"' not in ids_sql, (
+        "Первая фаза должна выбирать только идентификаторы постов страницы."
+    )
+    assert " IN (" in hydrate_sql and "LIMIT" not in hydrate_sql, (
+        "Вторая фаза должна загружать только посты страницы по их `id`."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_scheduled_post_goes_live_without_restart(
+        mixer: Mixer, user, published_category, user_client, client,
+        monkeypatch
+):
+    from blog.services import post_utils
+
+    scheduled = mixer.blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(minutes=5),
+    )
+    assert not scheduled.is_visible
+    assert scheduled not in user_client.get("/").context["page_obj"]
+    assert scheduled.title not in client.get("/").content.decode()
+    assert post_utils.get_next_publication() == scheduled.pub_date
+
+    published = []
+    post_utils.posts_published.connect(
+        lambda post_ids, **kwargs: published.extend(post_ids), weak=False,
+        dispatch_uid="test_feed.published",
+    )
+    later = scheduled.pub_date
+    monkeypatch.setattr(post_utils, "now", lambda: later)
+    for response in (client.get("/"), user_client.get("/")):
+        assert scheduled.title in response.content.decode(), (
+            "Убедитесь, что отложенный пост появляется в ленте после"
+            " наступления даты публикации без перезапуска сервера."
+        )
+    post_utils.posts_published.disconnect(dispatch_uid="test_feed.published")
+    assert published == [scheduled.id]
+    assert post_utils.get_next_publication() is None
+
+
+def test_publish_scheduled_command(mixer: Mixer, user):
+    from blog.models import Post
+
+    due = mixer.blend("blog.Post", author=user, is_published=True,
+                      category__is_published=True,
+                      pub_date=timezone.now() + timedelta(minutes=5))
+    Post.objects.filter(pk=due.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    call_command("publish_scheduled", stdout=StringIO())
+    due.refresh_from_db()
+    assert due.is_visible, (
+        "Убедитесь, что команда `publish_scheduled` публикует посты,"
+        " дата публикации которых наступила."
+    )
+
+
+def test_partial_save_keeps_visibility_in_sync(mixer: Mixer, user):
+    from blog.models import Post
+
+    post = mixer.blend("blog.Post", author=user, is_published=True,
+                       category__is_published=True,
+                       pub_date=timezone.now() - timedelta(days=1))
+    assert post.is_visible
+    post.pub_date = timezone.now() + timedelta(days=1)
+    post.save(update_fields=["pub_date"])
+    assert not Post.objects.get(pk=post.pk).is_visible, (
+        "Убедитесь, что `save(update_fields=...)` пересчитывает"
+        " `is_visible`, если изменились поля, от которых он зависит."
+    )
+
+
+def test_category_toggle_propagates_visibility(
+        feed_posts, published_category, user_client
+):
+    from blog.models import Post
+
+    published_category.is_published = False
+    published_category.save()
+    assert not Post.objects.filter(is_visible=True).exists()
+    assert len(user_client.get("/").context["page_obj"]) == 0
+
+    published_category.is_published = True
+    published_category.save()
+    assert Post.objects.filter(is_visible=True).count() == len(feed_posts)
+
+    published_category.delete()
+    assert not Post.objects.filter(is_visible=True).exists(), (
+        "Посты удалённой категории не должны оставаться видимыми."
+    )
+
+
+def test_post_card_cache_follows_related_changes(
+        mixer: Mixer, post_with_published_location, user_client
+):
+    post = post_with_published_location
+    assert post.title in user_client.get("/").content.decode()
+
+    def rename_category():
+        post.category.title = "Обновлённая категория"
+        post.category.save()
+
+    def rename_location():
+        post.location.name = "Новое место"
+        post.location.save()
+
+    def rename_author():
+        post.author.username = "renamed_author"
+        post.author.save()
+
+    for change, fresh in (
+            (rename_category, "Обновлённая категория"),
+            (rename_location, "Новое место"),
+            (rename_author, "@renamed_author"),
+            (lambda: mixer.blend("blog.Comment", post=post), "(1)"),
+    ):
+        change()
+        assert fresh in user_client.get("/").content.decode(), (
+            "Убедитесь, что кеш карточки поста сбрасывается при изменении"
+            " категории, местоположения, автора и комментариев."
+        )
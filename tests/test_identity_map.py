@@ -0,0 +1,38 @@
+from collections import Counter
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_views_fetch_each_row_once_per_request(
+        mixer: Mixer, post_with_published_location, user_client,
+        another_user_client
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=post.author)
+    for client, url in (
+            (user_client, f"/posts/{post.id}/"),
+            (another_user_client, f"/posts/{post.id}/"),
+            (user_client, f"/posts/{post.id}/edit/"),
+            (user_client, f"/posts/{post.id}/delete/"),
+            (user_client, f"/posts/{post.id}/edit_comment/{comment.id}/"),
+            (user_client, f"/category/{post.category.slug}/"),
+            (user_client, f"/profile/{post.author.username}/"),
+            (another_user_client, f"/profile/{post.author.username}/"),
+    ):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == 200, url
+        repeated = [
+            sql for sql, times in Counter(
+                query["sql"] for query in queries
+            ).items() if times > 1
+        ]
+        assert not repeated, (
+            f"Убедитесь, что страница {url} загружает каждую строку не больше"
+            f" одного раза за запрос. Повторные запросы: {repeated}"
+        )
@@ -0,0 +1,84 @@
+import pytest
+from conftest import make_image
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def published_post(media_root, mixer, user, published_category):
+    post = mixer.blend("blog.Post", author=user, image=make_image(),
+                       is_published=True, category=published_category,
+                       pub_date=timezone.now())
+    post.refresh_from_db()
+    return post
+
+
+def read(response):
+    return b"".join(response.streaming_content)
+
+
+def test_media_supports_range_and_conditional_requests(
+        published_post, client
+):
+    url = published_post.image.url
+    with published_post.image.open() as image:
+        data = image.read()
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["Accept-Ranges"] == "bytes"
+    assert read(response) == data
+
+    response = client.get(url, HTTP_RANGE="bytes=10-19")
+    assert response.status_code == 206, (
+        "Убедитесь, что медиафайлы отдаются частями по заголовку Range."
+    )
+    assert response["Content-Range"] == f"bytes 10-19/{len(data)}"
+    assert read(response) == data[10:20]
+    assert read(client.get(url, HTTP_RANGE="bytes=-5")) == data[-5:]
+    assert client.get(
+        url, HTTP_RANGE=f"bytes={len(data)}-"
+    ).status_code == 416
+    assert client.get(
+        url, HTTP_RANGE="bytes=0-4", HTTP_IF_RANGE='"outdated"'
+    ).status_code == 200
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304, (
+        "Убедитесь, что медиафайлы поддерживают условные запросы."
+    )
+
+
+def test_unpublished_post_images_are_gated(
+        published_post, client, user_client, another_user_client
+):
+    published_post.is_published = False
+    published_post.save()
+    for url in (published_post.image.url,
+                published_post.get_image_url("admin")):
+        assert client.get(url).status_code == 404, (
+            "Убедитесь, что изображения неопубликованных постов не отдаются"
+            " посторонним."
+        )
+        assert another_user_client.get(url).status_code == 404
+        response = user_client.get(url)
+        assert response.status_code == 200, (
+            "Убедитесь, что автор видит изображения своего"
+            " неопубликованного поста."
+        )
+        assert "private" in response["Cache-Control"]
+
+
+def test_media_transfer_is_offloaded(published_post, client, settings):
+    name = published_post.image.name
+    settings.MEDIA_SERVING = "x-accel-redirect"
+    response = client.get(published_post.image.url)
+    assert response["X-Accel-Redirect"] == (
+        settings.MEDIA_ACCEL_PREFIX + name
+    ), "Убедитесь, что передачу файла можно поручить nginx."
+    assert response.content == b""
+
+    settings.MEDIA_SERVING = "x-sendfile"
+    response = client.get(published_post.image.url)
+    assert response["X-Sendfile"] == str(settings.MEDIA_ROOT / name)
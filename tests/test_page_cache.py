@@ -0,0 +1,153 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count_blog_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response, sum("blog_" in query["sql"] for query in queries)
+
+
+# Кеш сбрасывается после фиксации транзакции — нужны настоящие транзакции.
+@pytest.mark.django_db(transaction=True)
+def test_anonymous_feed_pages_are_cached(
+        mixer: Mixer, post_with_published_location, client, user_client, rf
+):
+    from blog.services import page_cache
+
+    post = post_with_published_location
+    for url in ("/", f"/category/{post.category.slug}/",
+                f"/profile/{post.author.username}/"):
+        count_blog_queries(client, url)
+        _, queries = count_blog_queries(client, url)
+        assert queries == 0, (
+            f"Убедитесь, что страница {url} для анонимных пользователей"
+            " отдаётся из кеша."
+        )
+        _, queries = count_blog_queries(user_client, url)
+        assert queries > 0, "Залогиненным пользователям кеш не отдаётся."
+
+    mixer.blend("blog.Comment", post=post)
+    response, queries = count_blog_queries(client, "/")
+    assert queries > 0 and "(1)" in response.content.decode(), (
+        "Убедитесь, что кеш страниц сбрасывается при изменении контента."
+    )
+
+    # Пока другой процесс перестраивает страницу, отдаётся прежняя копия.
+    post.title = "Новый заголовок"
+    post.save()
+    lock_key = f"{page_cache.get_page_cache_key(rf.get('/'))}:lock"
+    cache.add(lock_key, True)
+    response, _ = count_blog_queries(client, "/")
+    assert "Новый заголовок" not in response.content.decode(), (
+        "Пока страницу перестраивает другой процесс, должна отдаваться"
+        " прежняя копия."
+    )
+    stale_etag = response["ETag"]
+    cache.delete(lock_key)
+    response = client.get("/", HTTP_IF_NONE_MATCH=stale_etag)
+    assert response.status_code == 200, (
+        "ETag прежней копии должен соответствовать версии, по которой она"
+        " построена, иначе клиент так и не получит перестроенную страницу."
+    )
+    assert "Новый заголовок" in response.content.decode()
+
+    _, queries = count_blog_queries(client, "/?utm_source=spam")
+    assert queries == 0, (
+        "Убедитесь, что посторонние параметры запроса не создают отдельных"
+        " записей в кеше страниц."
+    )
+
+
+def test_conditional_get(
+        mixer: Mixer, post_with_published_location, user_client
+):
+    post = post_with_published_location
+    for url in ("/", f"/posts/{post.id}/",
+                f"/profile/{post.author.username}/"):
+        response = user_client.get(url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert not_modified.status_code == 304, (
+            f"Убедитесь, что {url} отвечает 304 на совпадающий ETag."
+        )
+        # Сессия, пользователь, пост и ветка его комментариев.
+        assert len(queries) <= 4, (
+            "Ответ 304 не должен строить страницу."
+        )
+        assert not_modified["Last-Modified"] == last_modified
+
+    post.refresh_from_db()
+    assert user_client.get(f"/posts/{post.id}/")["Last-Modified"] == (
+        http_date(post.updated_at.timestamp())
+    ), "Last-Modified страницы поста — время последнего изменения поста."
+
+    etag = user_client.get(f"/posts/{post.id}/")["ETag"]
+    comment = mixer.blend("blog.Comment", post=post)
+    new_etag = user_client.get(f"/posts/{post.id}/")["ETag"]
+    assert new_etag != etag
+    comment.text = "Исправленный комментарий"
+    comment.save()
+    assert user_client.get(
+        f"/posts/{post.id}/", HTTP_IF_NONE_MATCH=new_etag
+    ).status_code == 200, (
+        "Правка комментария должна менять валидаторы страницы поста."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_feed_version_changes_after_commit(post_with_published_location):
+    from django.db import transaction
+
+    from blog.services.page_cache import get_feed_version
+
+    version = get_feed_version()
+    with transaction.atomic():
+        post_with_published_location.title = "Новый заголовок"
+        post_with_published_location.save()
+        assert get_feed_version() == version, (
+            "Версия лент должна меняться только после фиксации транзакции:"
+            " иначе страница по старым строкам попадёт в кеш под новой"
+            " версией."
+        )
+    assert get_feed_version() != version
+
+
+def test_conditional_get_sees_same_second_edits_and_hides_posts(
+        mixer: Mixer, post_with_published_location, user_client,
+        another_user_client
+):
+    from datetime import timedelta
+
+    from blog.models import Post
+
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    response = user_client.get(url)
+    etag, last_modified = response["ETag"], response["Last-Modified"]
+    Post.objects.filter(pk=post.pk).update(
+        updated_at=post.updated_at + timedelta(microseconds=1)
+    )
+    assert user_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+    assert user_client.get(
+        url, HTTP_IF_MODIFIED_SINCE=last_modified
+    ).status_code == 200, (
+        "Правка в ту же секунду не должна давать 304 по If-Modified-Since."
+    )
+
+    post.is_published = False
+    post.save()
+    assert another_user_client.get(url).status_code == 404
+    for headers in ({"HTTP_IF_NONE_MATCH": "*"},
+                    {"HTTP_IF_MODIFIED_SINCE": last_modified}):
+        assert another_user_client.get(url, **headers).status_code == 404, (
+            "Скрытый пост не должен отвечать посторонним 304 вместо 404."
+        )
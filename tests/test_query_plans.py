@@ -0,0 +1,94 @@
+import re
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+# Полный просмотр таблицы: «SCAN blog_post», в старых версиях SQLite
+# «SCAN TABLE blog_post», в том числе под псевдонимом («AS U0»); просмотр
+# по индексу («... USING INDEX ...») допустим.
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+( AS \w+)?$", re.MULTILINE)
+TEMP_SORT = "USE TEMP B-TREE"
+
+
+@pytest.fixture
+def populated_blog(mixer: Mixer, user, another_user, published_category):
+    base = timezone.now() - timedelta(days=1)
+    posts = mixer.cycle(30).blend(
+        "blog.Post",
+        author=mixer.sequence(user, another_user),
+        is_published=True,
+        category=published_category,
+        pub_date=(base - timedelta(hours=i) for i in range(30)),
+    )
+    mixer.cycle(5).blend("blog.Comment", post=posts[0], author=user)
+    return posts
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return "\n".join(row[-1] for row in cursor.fetchall())
+
+
+def assert_indexed(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    for query in queries:
+        sql = query["sql"]
+        if not sql.startswith("SELECT") or "blog_" not in sql:
+            continue
+        plan = explain(sql)
+        assert not FULL_SCAN.search(plan) and TEMP_SORT not in plan, (
+            f"Запрос страницы {url} не использует индексы:\n{sql}\n{plan}"
+        )
+    return response
+
+
+def test_feed_queries_use_indexes(
+        populated_blog, user, another_user, user_client, client, monkeypatch
+):
+    from blog import settings as blog_settings
+
+    post = populated_blog[0]
+    category = post.category
+    for url in (
+            "/",
+            "/?page=2",
+            f"/category/{category.slug}/",
+            f"/profile/{another_user.username}/",
+            f"/profile/{user.username}/",
+    ):
+        assert_indexed(client, url)
+        assert_indexed(user_client, url)
+    assert_indexed(user_client, f"/posts/{post.id}/")
+
+    monkeypatch.setattr(blog_settings, "POSTS_PAGINATION", "cursor")
+    page = assert_indexed(user_client, "/").context["page_obj"]
+    assert_indexed(user_client, f"/?cursor={page.next_cursor}")
+    page = assert_indexed(
+        user_client, f"/category/{category.slug}/?cursor={page.next_cursor}"
+    ).context["page_obj"]
+    assert_indexed(user_client, f"/?cursor={page.previous_cursor}")
+
+
+def test_image_variant_lookup_uses_index(populated_blog):
+    from blog.media import get_image_posts
+
+    digest = "3f" * 32
+    for name in (f"posts_images/3f/{digest}.jpg",
+                 f"posts_images/3f/thumbnails/640/{digest}.webp"):
+        with CaptureQueriesContext(connection) as queries:
+            list(get_image_posts(name).values_list("is_visible",
+                                                   "author_id"))
+        plan = explain(queries[0]["sql"])
+        assert not FULL_SCAN.search(plan), (
+            "Поиск постов по изображению и его копии должен идти"
+            f" по индексу:\n{plan}"
+        )
@@ -0,0 +1,176 @@
+import sqlite3
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+
+
+def test_router_reads_from_replicas_only_when_allowed(settings):
+    from django.contrib.sessions.models import Session
+
+    from blog.models import Post
+    from blog.routers import ReplicaRouter, read_from_replicas
+
+    router = ReplicaRouter()
+    settings.DATABASE_REPLICAS = ["replica1"]
+    assert router.db_for_read(Post) == "default"
+    with read_from_replicas():
+        assert router.db_for_read(Post) == "replica1", (
+            "Убедитесь, что представления только для чтения читают"
+            " из реплик."
+        )
+        assert router.db_for_read(Session) == "default"
+        assert router.db_for_write(Post) == "default"
+    assert not router.allow_migrate("replica1", "blog")
+
+
+@pytest.mark.django_db
+def test_writes_pin_user_to_primary(
+        settings, mixer: Mixer, post_with_published_location, user_client,
+        monkeypatch
+):
+    from blog import routers, views
+
+    settings.DATABASE_REPLICAS = ["replica1"]
+    post = post_with_published_location
+    allowed = []
+    get_queryset = views.IndexView.get_queryset
+
+    def spy(view):
+        allowed.append(routers.replica_reads.get())
+        return get_queryset(view)
+
+    monkeypatch.setattr(views.IndexView, "get_queryset", spy)
+    user_client.get("/")
+    response = user_client.post(
+        f"/{post.id}/comment/", data={"text": "Новый комментарий"}
+    )
+    assert response.cookies["primary_pin"]["max-age"] > 0
+    user_client.get("/")
+    assert allowed == [True, False], (
+        "Убедитесь, что после записи пользователь какое-то время читает"
+        " только из основной базы."
+    )
+
+
+@pytest.mark.django_db
+def test_cached_and_validated_pages_come_from_primary(
+        settings, mixer: Mixer, post_with_published_location, client,
+        user_client, monkeypatch
+):
+    from blog import routers, views
+    from blog.services import post_utils
+
+    settings.DATABASE_REPLICAS = ["replica1"]
+    allowed = []
+    get_queryset = views.IndexView.get_queryset
+
+    def spy(view):
+        allowed.append(routers.replica_reads.get())
+        return get_queryset(view)
+
+    monkeypatch.setattr(views.IndexView, "get_queryset", spy)
+    response = client.get("/")
+    assert allowed == [False] and response.has_header("ETag"), (
+        "Страница для кеша страниц помечается версией основной базы"
+        " и должна строиться по ней же, а не по реплике."
+    )
+    response = user_client.get("/")
+    assert allowed == [False, True]
+    assert not response.has_header("ETag"), (
+        "У страницы, построенной по реплике, не должно быть валидаторов,"
+        " посчитанных по основной базе."
+    )
+
+    scheduled_reads = []
+    monkeypatch.setattr(
+        post_utils, "get_next_publication",
+        lambda: scheduled_reads.append(routers.replica_reads.get()),
+    )
+    with routers.read_from_replicas():
+        post_utils.activate_scheduled_posts()
+    assert scheduled_reads == [False], (
+        "Публикация по расписанию должна читать основную базу."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_replicas_copies_primary(
+        settings, mixer: Mixer, post_with_published_location, tmp_path,
+        monkeypatch
+):
+    target = tmp_path / "replica.sqlite3"
+    settings.DATABASE_REPLICAS = ["replica1"]
+    monkeypatch.setitem(settings.DATABASES, "replica1", {"NAME": target})
+    call_command("sync_replicas", stdout=StringIO())
+    replica = sqlite3.connect(target)
+    try:
+        titles = replica.execute("SELECT title FROM blog_post").fetchall()
+    finally:
+        replica.close()
+    assert titles == [(post_with_published_location.title,)], (
+        "Убедитесь, что команда `sync_replicas` копирует основную базу"
+        " в реплики."
+    )
+
+
+def test_comment_router_isolates_comments(settings):
+    from blog.models import Comment, Post
+    from blog.routers import CommentRouter
+
+    router = CommentRouter()
+    settings.COMMENTS_DATABASE = "comments"
+    assert router.db_for_write(Comment) == "comments"
+    assert router.db_for_read(Comment) == "comments"
+    assert router.db_for_read(Post) is None
+    assert router.allow_migrate("comments", "blog", model_name="comment")
+    assert not router.allow_migrate("comments", "blog", model_name="post"), (
+        "В базе комментариев не должно быть других таблиц."
+    )
+    assert router.allow_migrate("default", "blog", model_name="post") is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comments_live_in_their_own_database(
+        settings, mixer: Mixer, post_with_published_location, another_user,
+        client, tmp_path, monkeypatch
+):
+    from django.db import connections
+    from django.test.utils import CaptureQueriesContext
+
+    from blog.models import Comment, CommentThread
+
+    monkeypatch.setitem(settings.DATABASES, "comments", {
+        **settings.DATABASES["default"],
+        "NAME": tmp_path / "comments.sqlite3",
+    })
+    settings.COMMENTS_DATABASE = "comments"
+    try:
+        call_command("migrate", database="comments", stdout=StringIO())
+        post = post_with_published_location
+        with CaptureQueriesContext(connections["default"]) as primary:
+            mixer.cycle(2).blend("blog.Comment", post=post, author=post.author)
+            mixer.blend("blog.Comment", post=post, author=another_user)
+        assert not primary.captured_queries, (
+            "Запись комментария не должна обращаться к основной базе."
+        )
+        assert CommentThread.objects.using("comments").get(
+            post=post).count == 3
+        assert not Comment.objects.using("default").exists()
+        assert "Комментарии (3)" in client.get("/").content.decode()
+
+        another_user.delete()
+        assert CommentThread.objects.get(post=post).count == 2, (
+            "Убедитесь, что комментарии удалённого автора удаляются"
+            " из базы комментариев и счётчик уменьшается."
+        )
+        post.delete()
+        assert not Comment.objects.exists()
+        assert not CommentThread.objects.exists(), (
+            "Убедитесь, что вместе с постом из базы комментариев удаляются"
+            " его комментарии и их ветка."
+        )
+    finally:
+        connections["comments"].close()
+        del connections["comments"]
@@ -0,0 +1,155 @@
+import base64
+import os
+import time
+from io import StringIO
+
+import pytest
+from conftest import make_image_bytes
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+TUS = {"HTTP_TUS_RESUMABLE": "1.0.0"}
+
+
+@pytest.fixture
+def upload_dirs(media_root, settings, tmp_path):
+    settings.RESUMABLE_UPLOAD_DIR = tmp_path / "uploads"
+    return tmp_path
+
+
+def create_upload(client, length):
+    response = client.post(
+        "/uploads/", **TUS, HTTP_UPLOAD_LENGTH=str(length),
+        HTTP_UPLOAD_METADATA="filename "
+        + base64.b64encode("фото.png".encode()).decode(),
+    )
+    assert response.status_code == 201, (
+        "Убедитесь, что POST-запрос на `/uploads/` создаёт загрузку."
+    )
+    return response["Location"]
+
+
+def patch(client, url, offset, chunk):
+    return client.generic(
+        "PATCH", url, chunk, content_type="application/offset+octet-stream",
+        HTTP_UPLOAD_OFFSET=str(offset), **TUS,
+    )
+
+
+def test_upload_is_resumed_and_attached_to_post(
+        upload_dirs, user_client, published_category
+):
+    from blog.models import Post
+
+    data = make_image_bytes(image_format="PNG")
+    url = create_upload(user_client, len(data))
+    half = len(data) // 2
+    assert patch(user_client, url, 0, data[:half]).status_code == 204
+    assert patch(user_client, url, 0, data[:half]).status_code == 409, (
+        "Убедитесь, что часть с неверным смещением не принимается."
+    )
+    response = user_client.head(url, **TUS)
+    assert response["Upload-Offset"] == str(half), (
+        "Убедитесь, что HEAD-запрос сообщает, сколько байт уже загружено."
+    )
+    response = patch(user_client, url, half, data[half:])
+    assert response["Upload-Offset"] == str(len(data))
+
+    token = url.rstrip("/").rsplit("/", 1)[-1]
+    response = user_client.post("/posts/create/", data={
+        "title": "Докачанный",
+        "text": "Текст",
+        "pub_date": "2020-01-01T10:00",
+        "category": published_category.id,
+        "is_published": True,
+        "upload_token": token,
+    })
+    assert response.status_code == 302, (
+        "Убедитесь, что форма поста принимает токен готовой загрузки."
+    )
+    post = Post.objects.get(title="Докачанный")
+    with post.image.open() as image:
+        assert image.read() == data
+    assert not list((upload_dirs / "uploads").iterdir()), (
+        "Убедитесь, что после сохранения поста загрузка удаляется."
+    )
+
+
+def test_upload_belongs_to_its_author(
+        upload_dirs, user_client, another_user_client, published_category
+):
+    data = make_image_bytes(image_format="PNG")
+    url = create_upload(user_client, len(data))
+    patch(user_client, url, 0, data)
+    assert another_user_client.head(url, **TUS).status_code == 404
+    response = another_user_client.post("/posts/create/", data={
+        "title": "Чужая загрузка",
+        "text": "Текст",
+        "pub_date": "2020-01-01T10:00",
+        "category": published_category.id,
+        "upload_token": url.rstrip("/").rsplit("/", 1)[-1],
+    })
+    assert response.status_code == 200
+    assert "upload_token" in response.context["form"].errors
+
+
+def test_upload_protocol_checks(upload_dirs, user_client, settings):
+    assert user_client.post(
+        "/uploads/", HTTP_UPLOAD_LENGTH="10"
+    ).status_code == 412, (
+        "Убедитесь, что запросы без заголовка Tus-Resumable отклоняются."
+    )
+    settings.UPLOAD_MAX_BYTES = 100
+    assert user_client.post(
+        "/uploads/", **TUS, HTTP_UPLOAD_LENGTH="101"
+    ).status_code == 413
+    url = create_upload(user_client, 10)
+    assert patch(user_client, url, 0, b"x" * 11).status_code == 413
+
+    call_command("purge_uploads", "--max-age=0", stdout=StringIO())
+    assert user_client.head(url, **TUS).status_code == 404, (
+        "Убедитесь, что команда `purge_uploads` удаляет старые загрузки."
+    )
+
+
+def test_rejected_form_closes_upload(
+        upload_dirs, user_client, published_category
+):
+    data = make_image_bytes(image_format="PNG")
+    url = create_upload(user_client, len(data))
+    patch(user_client, url, 0, data)
+    response = user_client.post("/posts/create/", data={
+        "text": "Без заголовка",
+        "pub_date": "2020-01-01T10:00",
+        "category": published_category.id,
+        "upload_token": url.rstrip("/").rsplit("/", 1)[-1],
+    })
+    assert response.status_code == 200
+    image = response.context["form"].cleaned_data["image"]
+    assert image.closed, (
+        "Убедитесь, что форма закрывает файл загрузки после проверки,"
+        " даже если пост не сохранён."
+    )
+
+
+def test_purge_uploads_by_last_change(upload_dirs, user_client):
+    directory = upload_dirs / "uploads"
+    stale = time.time() - 3600
+    slow = create_upload(user_client, 10).rstrip("/").rsplit("/", 1)[-1]
+    os.utime(directory / f"{slow}.json", (stale, stale))
+    abandoned = create_upload(user_client, 10).rstrip("/").rsplit("/", 1)[-1]
+    orphans = [directory / "orphan", directory / "lost.json"]
+    for path in orphans + [directory / abandoned,
+                           directory / f"{abandoned}.json"]:
+        path.touch()
+        os.utime(path, (stale, stale))
+
+    call_command("purge_uploads", "--max-age=60", stdout=StringIO())
+    assert sorted(path.name for path in directory.iterdir()) == sorted(
+        [slow, f"{slow}.json"]
+    ), (
+        "Убедитесь, что `purge_uploads` удаляет загрузки и осиротевшие"
+        " файлы по времени последнего изменения и не трогает загрузки,"
+        " которые ещё дописываются."
+    )
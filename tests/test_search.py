@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def forest_posts(mixer: Mixer, user, published_category):
+    published = dict(author=user, category=published_category,
+                     is_published=True,
+                     pub_date=timezone.now() - timedelta(days=1))
+    return {
+        "title": mixer.blend("blog.Post", title="Ёлки в лесу",
+                             text="Прогулка", **published),
+        "text": mixer.blend("blog.Post", title="Прогулка",
+                            text="Шли по лесной тропе", **published),
+        "hidden": mixer.blend("blog.Post", title="Лесной черновик",
+                              text="Текст", **{**published,
+                                               "is_published": False}),
+        "other": mixer.blend("blog.Post", title="Море", text="Волны",
+                             **published),
+    }
+
+
+def found(client, query):
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == 200
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_search_ranks_published_posts(forest_posts, user_client):
+    assert found(user_client, "лес") == [
+        forest_posts["title"].id, forest_posts["text"].id,
+    ], (
+        "Убедитесь, что поиск находит опубликованные посты по началу слова"
+        " и выше ставит совпадения в заголовке."
+    )
+    assert found(user_client, "елки") == [forest_posts["title"].id], (
+        "Убедитесь, что при поиске «ё» и «е» не различаются."
+    )
+    assert found(user_client, 'лес" OR "море') == [], (
+        "Синтаксис FTS5 во вводе пользователя не должен работать."
+    )
+    assert found(user_client, "") == []
+
+
+def test_search_index_follows_post_changes(forest_posts, user_client):
+    post = forest_posts["other"]
+    post.title = "Лесное озеро"
+    post.save()
+    assert post.id in found(user_client, "лесное")
+    assert found(user_client, "море") == []
+    post.delete()
+    assert post.id not in found(user_client, "лесное")
+
+
+def test_search_is_paginated_by_cursor(
+        mixer: Mixer, user, published_category, user_client
+):
+    posts = mixer.cycle(25).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, title="Поиск", text="Одинаковый текст",
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    seen, params = [], {"q": "поиск"}
+    while params:
+        response = user_client.get("/search/", params)
+        page = response.context["page_obj"]
+        seen.extend(post.id for post in page)
+        params = page.has_next() and {"q": "поиск",
+                                      "cursor": page.next_cursor}
+    assert sorted(seen) == sorted(post.id for post in posts), (
+        "Убедитесь, что результаты поиска разбиты на страницы и выводятся"
+        " по одному разу."
+    )
+
+
+def test_admin_search_uses_index(forest_posts, admin_client):
+    response = admin_client.get("/admin/blog/post/", {"q": "лес"})
+    assert response.status_code == 200
+    assert set(response.context["cl"].result_list) == {
+        forest_posts["title"], forest_posts["text"], forest_posts["hidden"],
+    }
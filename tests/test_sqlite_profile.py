@@ -0,0 +1,41 @@
+import pytest
+from django.db import connection
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas_are_applied_to_new_connections(settings):
+    from blog.sqlite import apply_sqlite_pragmas
+
+    settings.SQLITE_PRAGMAS = {
+        'busy_timeout': 4321,
+        'cache_size': -2048,
+    }
+    apply_sqlite_pragmas(sender=connection.__class__, connection=connection)
+    with connection.cursor() as cursor:
+        values = {}
+        for name in settings.SQLITE_PRAGMAS:
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+    assert values == settings.SQLITE_PRAGMAS, (
+        'Убедитесь, что прагмы из `SQLITE_PRAGMAS` применяются'
+        ' к соединению с базой.'
+    )
+
+
+def test_production_profile_settings(monkeypatch):
+    import importlib
+
+    from blogicum import settings as project_settings
+
+    monkeypatch.setenv('BLOGICUM_DB_PROFILE', 'production')
+    production = importlib.reload(project_settings)
+    try:
+        assert production.DATABASES['default']['CONN_MAX_AGE'] > 0
+        assert production.SQLITE_PRAGMAS['journal_mode'] == 'WAL'
+        assert production.SQLITE_PRAGMAS['synchronous'] == 'NORMAL'
+        assert 'locmem' not in production.CACHES['default']['BACKEND'], (
+            'Убедитесь, что в профиле production кеш общий для воркеров.'
+        )
+    finally:
+        monkeypatch.delenv('BLOGICUM_DB_PROFILE')
+        importlib.reload(project_settings)
@@ -0,0 +1,73 @@
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+CSS = "body { color: #333; }\n" * 200
+
+
+@pytest.fixture
+def collected_static(settings, tmp_path):
+    source = tmp_path / "source"
+    (source / "css").mkdir(parents=True)
+    (source / "css" / "blog.css").write_text(CSS)
+    settings.STATICFILES_DIRS = [source]
+    settings.STATIC_ROOT = tmp_path / "collected"
+    settings.STATICFILES_STORAGE = (
+        "blog.staticfiles.CompressedManifestStaticFilesStorage"
+    )
+    call_command("collectstatic", interactive=False, stdout=StringIO())
+    manifest = json.loads(
+        (settings.STATIC_ROOT / "staticfiles.json").read_text()
+    )
+    return settings.STATIC_ROOT, manifest["paths"]["css/blog.css"]
+
+
+def test_collectstatic_writes_hashed_and_compressed_files(collected_static):
+    root, hashed_name = collected_static
+    assert hashed_name != "css/blog.css", (
+        "Убедитесь, что collectstatic даёт файлам имена с хешем содержимого."
+    )
+    compressed = root / f"{hashed_name}.gz"
+    assert compressed.exists(), (
+        "Убедитесь, что collectstatic кладёт рядом с файлом его сжатую"
+        " копию."
+    )
+    assert gzip.decompress(compressed.read_bytes()).decode() == CSS
+
+
+def test_static_is_served_precompressed_and_cached(collected_static, client):
+    _, hashed_name = collected_static
+    url = f"/static/{hashed_name}"
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert response["Content-Encoding"] == "gzip", (
+        "Убедитесь, что статика отдаётся сжатой копией, если клиент её"
+        " принимает."
+    )
+    assert response["Content-Type"].startswith("text/css")
+    assert "Accept-Encoding" in response["Vary"]
+    assert "immutable" in response["Cache-Control"], (
+        "Убедитесь, что статика с хешем в имени кешируется надолго."
+    )
+    body = b"".join(response.streaming_content)
+    assert gzip.decompress(body).decode() == CSS
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip;q=0")
+    assert not response.has_header("Content-Encoding")
+    assert b"".join(response.streaming_content).decode() == CSS
+
+    response = client.get("/static/css/blog.css")
+    assert "immutable" not in response["Cache-Control"]
+
+
+def test_collectstatic_dry_run_keeps_manifest(collected_static, settings):
+    manifest = settings.STATIC_ROOT / "staticfiles.json"
+    before = manifest.read_text()
+    call_command("collectstatic", interactive=False, dry_run=True,
+                 stdout=StringIO())
+    assert manifest.read_text() == before, (
+        "Убедитесь, что `collectstatic --dry-run` не перезаписывает манифест."
+    )
@@ -0,0 +1,105 @@
+import os
+import time
+from io import StringIO
+
+import pytest
+from conftest import make_image
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def stored_files(root):
+    return sorted(
+        path for path in root.rglob("*")
+        if path.is_file() and ".locks" not in path.parts
+    )
+
+
+def purge_media(grace):
+    call_command("purge_media", f"--grace={grace}", stdout=StringIO())
+
+
+def test_identical_images_are_stored_once(
+        media_root, mixer, user, django_capture_on_commit_callbacks
+):
+    from blog.storage import is_content_addressed
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first = mixer.blend("blog.Post", author=user, image=make_image())
+        second = mixer.blend("blog.Post", author=user, image=make_image())
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.image.name == second.image.name, (
+        "Убедитесь, что одинаковые изображения хранятся одним файлом."
+    )
+    assert is_content_addressed(first.image.name)
+    assert second.image_variants == first.image_variants != {}
+    files = stored_files(media_root)
+
+    first.delete()
+    purge_media(grace=0)
+    assert stored_files(media_root) == files, (
+        "Убедитесь, что изображение, на которое ссылается другой пост,"
+        " не удаляется."
+    )
+    second.delete()
+    purge_media(grace=60)
+    assert stored_files(media_root) == files, (
+        "Файлы без постов удаляются только по истечении `--grace`."
+    )
+    purge_media(grace=0)
+    assert stored_files(media_root) == [], (
+        "Убедитесь, что `purge_media` удаляет изображение без постов"
+        " вместе с копиями."
+    )
+
+
+def test_resaved_image_survives_purge(
+        media_root, mixer, user, django_capture_on_commit_callbacks
+):
+    from django.core.files.storage import default_storage
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post = mixer.blend("blog.Post", author=user, image=make_image())
+    post.refresh_from_db()
+    stale = time.time() - 3600
+    for path in stored_files(media_root):
+        os.utime(path, (stale, stale))
+    post.delete()
+    # Тот же файл сохраняется для поста, который ещё не зафиксирован.
+    name = default_storage.save("posts_images/photo.jpg", make_image())
+    assert name == post.image.name
+    purge_media(grace=60)
+    assert stored_files(media_root) == [media_root / name], (
+        "Убедитесь, что повторное сохранение файла защищает его от"
+        " удаления, а ненужные копии удаляются."
+    )
+
+
+def test_content_addressed_media_is_immutable(
+        media_root, mixer, user, client, published_category,
+        django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        post = mixer.blend("blog.Post", author=user, image=make_image(),
+                           is_published=True, category=published_category,
+                           pub_date=timezone.now())
+    post.refresh_from_db()
+    from blog import settings as blog_settings
+
+    response = client.get(post.image.url)
+    assert "immutable" in response["Cache-Control"], (
+        "Убедитесь, что файлы с именами по содержимому отдаются"
+        " с `Cache-Control: immutable`."
+    )
+    assert f"max-age={blog_settings.MEDIA_MAX_AGE}" in (
+        response["Cache-Control"]
+    ), (
+        "Доступ к изображению отзывается снятием поста с публикации —"
+        " кешировать его на год нельзя."
+    )
+    response = client.get(post.get_image_url("admin"))
+    assert response.status_code == 200
+    assert not response.has_header("Cache-Control")
@@ -0,0 +1,119 @@
+import subprocess
+import sys
+from io import StringIO
+
+import pytest
+from conftest import make_image
+from django.core.management import call_command
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+LARGE = (1600, 1200)
+CAMERA_EXIF = {0x010F: "Camera"}
+
+
+def test_uploaded_image_gets_thumbnails(
+        media_root, user_client, published_category,
+        django_capture_on_commit_callbacks
+):
+    from blog import settings as blog_settings
+    from blog.models import Post
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.post("/posts/create/", data={
+            "title": "С картинкой",
+            "text": "Текст",
+            "pub_date": "2020-01-01T10:00",
+            "category": published_category.id,
+            "is_published": True,
+            "image": make_image(LARGE, exif=CAMERA_EXIF),
+        })
+    assert response.status_code == 302
+    post = Post.objects.get(title="С картинкой")
+    expected = set(blog_settings.THUMBNAIL_SIZES) | {
+        f"{image_format}-{width}"
+        for image_format in blog_settings.IMAGE_FORMATS
+        for width in blog_settings.IMAGE_WIDTHS
+    }
+    assert set(post.image_variants) == expected, (
+        "Убедитесь, что при сохранении поста с изображением создаются"
+        " его уменьшенные копии во всех форматах и ширинах."
+    )
+    for variant, name in post.image_variants.items():
+        with Image.open(media_root / name) as thumbnail:
+            if variant in blog_settings.THUMBNAIL_SIZES:
+                assert max(thumbnail.size) == max(
+                    blog_settings.THUMBNAIL_SIZES[variant]
+                )
+            else:
+                image_format, width = variant.split("-")
+                assert thumbnail.width == int(width)
+                assert thumbnail.format.lower() == image_format
+            assert not thumbnail.getexif(), (
+                "Убедитесь, что из копий изображения удаляются EXIF-данные."
+            )
+    content = user_client.get("/").content.decode()
+    assert f'src="{post.card_image_url}"' in content, (
+        "Убедитесь, что лента показывает уменьшенную копию изображения."
+    )
+    assert f'src="{post.image.url}"' not in content
+    for mime_type, srcset in post.image_sources:
+        assert f'type="{mime_type}" srcset="{srcset}"' in content, (
+            "Убедитесь, что карточка поста перечисляет копии изображения"
+            " в srcset."
+        )
+
+
+def test_small_image_is_not_upscaled(
+        media_root, mixer, user, django_capture_on_commit_callbacks
+):
+    from blog import settings as blog_settings
+
+    smallest = min(blog_settings.IMAGE_WIDTHS)
+    with django_capture_on_commit_callbacks(execute=True):
+        post = mixer.blend("blog.Post", author=user,
+                           image=make_image((smallest - 20, 100)))
+    post.refresh_from_db()
+    assert [width for width, _ in post.get_image_widths("webp")] == [
+        smallest - 20
+    ], (
+        "Убедитесь, что srcset объявляет фактическую ширину копии,"
+        " а не заказанную."
+    )
+    name = post.image_variants[f"webp-{smallest - 20}"]
+    with Image.open(media_root / name) as thumbnail:
+        assert thumbnail.width == smallest - 20
+    assert f"{smallest - 20}w" in dict(post.image_sources)["image/webp"]
+
+
+def test_backfill_thumbnails(media_root, mixer, user, published_category):
+    from blog.models import Post
+
+    post = mixer.blend("blog.Post", author=user, image=make_image(LARGE),
+                       category=published_category)
+    Post.objects.filter(pk=post.pk).update(image_variants={})
+    call_command("backfill_thumbnails", "--workers=2", stdout=StringIO())
+    post.refresh_from_db()
+    assert "admin" in post.image_variants, (
+        "Убедитесь, что команда `backfill_thumbnails` создаёт копии"
+        " для уже загруженных изображений."
+    )
+
+
+def test_image_workers_do_not_load_django(settings, monkeypatch):
+    from blog.services import thumbnails
+
+    settings.IMAGE_WORKERS = 1
+    monkeypatch.setattr(thumbnails, "_pool", None)
+    assert thumbnails.get_pool()._mp_context.get_start_method() == "spawn", (
+        "Процессы пула изображений не должны быть копией процесса сервера."
+    )
+    loaded = subprocess.run(
+        [sys.executable, "-c",
+         "import sys, blog.services.imaging; print('django' in sys.modules)"],
+        capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+    ).stdout.strip()
+    assert loaded == "False", (
+        "Убедитесь, что функции для пула процессов не импортируют Django."
+    )
@@ -0,0 +1,66 @@
+import pytest
+from conftest import make_image
+from django.core.files.uploadedfile import TemporaryUploadedFile
+
+pytestmark = [pytest.mark.django_db]
+
+
+def create_post(client, category, image):
+    return client.post("/posts/create/", data={
+        "title": "С картинкой",
+        "text": "Текст",
+        "pub_date": "2020-01-01T10:00",
+        "category": category.id,
+        "is_published": True,
+        "image": image,
+    })
+
+
+def test_oversized_upload_is_rejected(
+        media_root, settings, user_client, published_category
+):
+    from blog.models import Post
+
+    image = make_image((300, 300), "PNG")
+    settings.UPLOAD_MAX_BYTES = image.size - 1
+    response = create_post(user_client, published_category, image)
+    assert response.status_code == 200
+    assert "image" in response.context["form"].errors, (
+        "Убедитесь, что файл больше `UPLOAD_MAX_BYTES` не принимается"
+        " и форма сообщает об ошибке."
+    )
+    assert not Post.objects.exists()
+
+
+def test_image_pixels_are_checked_before_decoding(
+        media_root, settings, user_client, published_category
+):
+    from blog.models import Post
+
+    settings.IMAGE_MAX_PIXELS = 100 * 100
+    response = create_post(user_client, published_category,
+                           make_image((101, 100), "PNG"))
+    assert response.status_code == 200
+    assert "image" in response.context["form"].errors, (
+        "Убедитесь, что изображение больше `IMAGE_MAX_PIXELS` пикселей"
+        " отклоняется."
+    )
+    assert not Post.objects.exists()
+
+    response = create_post(user_client, published_category,
+                           make_image((100, 100), "PNG"))
+    assert response.status_code == 302
+    assert Post.objects.get().image
+
+
+def test_uploads_are_streamed_to_disk(rf):
+    from blog.uploads import BoundedUploadHandler
+
+    handler = BoundedUploadHandler(rf.post("/"))
+    handler.new_file("image", "photo.png", "image/png", 10)
+    handler.receive_data_chunk(b"x" * 10, 0)
+    uploaded = handler.file_complete(10)
+    assert isinstance(uploaded, TemporaryUploadedFile), (
+        "Убедитесь, что даже небольшие файлы пишутся на диск, а не в память."
+    )
+    uploaded.close()
@@ -0,0 +1,177 @@
+import threading
+
+import pytest
+from conftest import make_image
+from django.db import connection
+from django.db.models.signals import post_save
+from mixer.backend.django import Mixer
+
+
+@pytest.fixture
+def writer_threads():
+    from blog.models import Comment
+
+    threads = []
+
+    def remember_thread(**kwargs):
+        threads.append(threading.current_thread().name)
+
+    post_save.connect(remember_thread, sender=Comment, weak=False,
+                      dispatch_uid="test_write_coordinator")
+    yield threads
+    post_save.disconnect(sender=Comment,
+                         dispatch_uid="test_write_coordinator")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_views_write_through_coordinator(
+        settings, mixer: Mixer, post_with_published_location, user_client,
+        writer_threads
+):
+    from blog.models import Comment
+
+    settings.WRITE_COORDINATOR = True
+    post = post_with_published_location
+    response = user_client.post(
+        f"/{post.id}/comment/", data={"text": "Через писателя"}
+    )
+    assert response.status_code == 302
+    assert Comment.objects.filter(text="Через писателя").exists()
+    assert writer_threads == ["blog-writer"], (
+        "Убедитесь, что при включённом `WRITE_COORDINATOR` представления"
+        " пишут в базу через координатор записи."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_admin_sends_only_database_writes_to_coordinator(
+        settings, media_root, admin_client, admin_user, published_category,
+        monkeypatch
+):
+    from blog.models import Post
+    from blog.storage import ContentAddressedStorage
+
+    settings.WRITE_COORDINATOR = True
+    threads = {}
+    storage_save = ContentAddressedStorage._save
+
+    def remember_storage_thread(storage, name, content):
+        threads["storage"] = threading.current_thread().name
+        return storage_save(storage, name, content)
+
+    def remember_post_thread(**kwargs):
+        threads["post"] = threading.current_thread().name
+
+    monkeypatch.setattr(ContentAddressedStorage, "_save",
+                        remember_storage_thread)
+    post_save.connect(remember_post_thread, sender=Post, weak=False,
+                      dispatch_uid="test_admin_write_coordinator")
+    try:
+        response = admin_client.post("/admin/blog/post/add/", data={
+            "title": "Из админки",
+            "text": "Текст",
+            "pub_date_0": "2020-01-01",
+            "pub_date_1": "10:00:00",
+            "author": admin_user.id,
+            "category": published_category.id,
+            "is_published": True,
+            "image": make_image(),
+        })
+    finally:
+        post_save.disconnect(sender=Post,
+                             dispatch_uid="test_admin_write_coordinator")
+    assert response.status_code == 302
+    assert Post.objects.filter(title="Из админки").exists()
+    assert threads == {"storage": threading.current_thread().name,
+                       "post": "blog-writer"}, (
+        "Убедитесь, что админка передаёт координатору только запись"
+        " в базу, а файлы сохраняет в потоке запроса."
+    )
+
+
+@pytest.fixture
+def readers_do_not_block_writer():
+    # Координатор работает с журналом WAL, где читающая транзакция
+    # админки не мешает писателю. Тестовая база — в памяти с общим кешем,
+    # там то же даёт read_uncommitted у читающего соединения.
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA read_uncommitted = 1")
+    yield
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA read_uncommitted = 0")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_admin_saves_object_and_history_together(
+        settings, admin_client, monkeypatch, readers_do_not_block_writer
+):
+    from django.contrib.admin.models import DELETION, LogEntry
+
+    from blog.models import Location
+
+    settings.WRITE_COORDINATOR = True
+    location = Location.objects.create(name="Старое место")
+    response = admin_client.post(
+        f"/admin/blog/location/{location.id}/change/",
+        data={"name": "Новое место", "is_published": True},
+    )
+    assert response.status_code == 302
+    location.refresh_from_db()
+    assert location.name == "Новое место"
+    assert LogEntry.objects.filter(object_id=str(location.id)).exists()
+
+    response = admin_client.post(
+        f"/admin/blog/location/{location.id}/delete/", data={"post": "yes"}
+    )
+    assert response.status_code == 302
+    assert not Location.objects.filter(pk=location.pk).exists()
+    assert LogEntry.objects.filter(object_id=str(location.id),
+                                   action_flag=DELETION).exists()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("журнал недоступен")
+
+    monkeypatch.setattr(LogEntry.objects, "log_action", fail)
+    with pytest.raises(RuntimeError):
+        admin_client.post("/admin/blog/location/add/", data={
+            "name": "Без журнала", "is_published": True,
+        })
+    assert not Location.objects.filter(name="Без журнала").exists(), (
+        "Убедитесь, что объект, журнал админки и связи сохраняются одной"
+        " операцией: без записи в журнал объект не должен сохраниться."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_coordinator_batches_concurrent_writes(mixer: Mixer):
+    from blog.models import Location
+    from blog.services.writer import WriteCoordinator
+
+    coordinator = WriteCoordinator(batch_window=0.05)
+    results, errors = [], []
+
+    def create(number):
+        if number == 3:
+            raise ValueError("ошибка одной из операций")
+        return Location.objects.create(name=f"Место {number}")
+
+    def submit(number):
+        try:
+            results.append(coordinator.submit(create, number))
+        except ValueError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=submit, args=(number,))
+               for number in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 9 and len(errors) == 1, (
+        "Ошибка одной операции не должна отменять остальные в пакете."
+    )
+    assert Location.objects.count() == 9
+    assert coordinator.batches < 10, (
+        "Убедитесь, что координатор объединяет одновременные записи"
+        " в общие транзакции."
+    )